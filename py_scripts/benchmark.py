@@ -0,0 +1,349 @@
+
+from typing import Final, Any, Callable, Sequence
+import argparse
+import gc
+import importlib
+import json
+import math
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+_SCRIPT_DIR: Final = os.path.dirname(os.path.abspath(__file__))
+_DEFAULT_TOLERANCE: Final = 0.5
+_MEMORY_TOLERANCE: Final = 0.1
+_CALIBRATION_LOOPS: Final = 200_000
+_CALIBRATION_REPEATS: Final = 7
+_EXPONENT_TOLERANCE: Final = 0.5
+
+
+def generate_day_01(size: int, rng: random.Random) -> str:
+  # size dial instructions
+  return ''.join(f"{rng.choice('LR')}{rng.randint(1, 999)}\n" for _ in range(size))
+
+
+def generate_day_02(size: int, rng: random.Random) -> str:
+  # size ID ranges of up to ten digits
+  ranges = []
+  for _ in range(size):
+    start = rng.randint(1, 10**rng.randint(1, 10))
+    ranges.append(f"{start}-{start + rng.randint(0, 200000)}")
+  return ','.join(ranges) + '\n'
+
+
+def generate_day_03(size: int, rng: random.Random) -> str:
+  # size banks of 100 digits
+  return ''.join(
+    ''.join(rng.choices('123456789', k=100)) + '\n' for _ in range(size)
+  )
+
+
+def generate_day_04(size: int, rng: random.Random) -> str:
+  # size x size grid, roughly 70% paper
+  return ''.join(
+    ''.join('@' if rng.random() < 0.7 else '.' for _ in range(size)) + '\n'
+    for _ in range(size)
+  )
+
+
+def generate_day_05(size: int, rng: random.Random) -> str:
+  # size fresh ranges and 5*size ingredient IDs
+  ranges = []
+  for _ in range(size):
+    start = rng.randint(1, 10**9)
+    ranges.append(f"{start}-{start + rng.randint(0, 10**7)}\n")
+  ingredients = [f"{rng.randint(1, 10**9)}\n" for _ in range(5*size)]
+  return ''.join(ranges) + '\n' + ''.join(ingredients)
+
+
+def generate_day_06(size: int, rng: random.Random) -> str:
+  # size problems of four numbers each, aligned left or right in their block
+  num_rows = 4
+  rows: list[list[str]] = [[] for _ in range(num_rows)]
+  operators = []
+  for _ in range(size):
+    width = rng.randint(1, 4)
+    align = rng.choice((str.ljust, str.rjust))
+    for row in rows:
+      row.append(align(str(rng.randint(10**(width-1), 10**width - 1)), width))
+    operators.append(rng.choice('+*').ljust(width))
+  lines = [' '.join(row) for row in rows] + [' '.join(operators)]
+  return '\n'.join(lines) + '\n'
+
+
+def generate_day_07(size: int, rng: random.Random) -> str:
+  # size columns and size splitter rows, each followed by an empty row
+  rows = ['.'*(size//2) + 'S' + '.'*(size - size//2 - 1)]
+  for row_num in range(size):
+    rows.append('.'*size)
+    rows.append(''.join(
+      '^' if col % 2 == row_num % 2 and rng.random() < 0.3 else '.'
+      for col in range(size)
+    ))
+  rows.append('.'*size)
+  return '\n'.join(rows) + '\n'
+
+
+def generate_day_08(size: int, rng: random.Random) -> str:
+  # size junction boxes in a 100000 cube
+  return ''.join(
+    f"{rng.randint(0, 100000)},{rng.randint(0, 100000)},{rng.randint(0, 100000)}\n"
+    for _ in range(size)
+  )
+
+
+# Generator and smallest size of the sweep for each day, chosen so the
+# smallest median is at least about 10 ms and timer noise stays small
+_GENERATORS: Final[dict[str, tuple[Callable[[int, random.Random], str], int]]] = {
+  'day_01': (generate_day_01, 16000),
+  'day_02': (generate_day_02, 1000),
+  'day_03': (generate_day_03, 300),
+  'day_04': (generate_day_04, 160),
+  'day_05': (generate_day_05, 5000),
+  'day_06': (generate_day_06, 1200),
+  'day_07': (generate_day_07, 256),
+  'day_08': (generate_day_08, 125),
+}
+
+
+def get_size_sweep(base_size: int, num_steps: int, factor: float) -> list[int]:
+  return sorted({max(1, round(base_size * factor**step)) for step in range(num_steps)})
+
+
+def get_percentile(sorted_times: Sequence[float], fraction: float) -> float:
+  # Linear interpolation between the closest ranks
+  position = fraction * (len(sorted_times) - 1)
+  low = math.floor(position)
+  high = min(low+1, len(sorted_times)-1)
+  return sorted_times[low] + (sorted_times[high] - sorted_times[low]) * (position - low)
+
+
+def fit_scaling_exponent(sizes: Sequence[int], times: Sequence[float]) -> float | None:
+  # Least squares slope of log(time) against log(size)
+  points = [
+    (math.log(size), math.log(run_time))
+    for size, run_time in zip(sizes, times) if size > 0 and run_time > 0
+  ]
+  if len(points) < 2:
+    return None
+  mean_x = statistics.fmean(x for x, _ in points)
+  mean_y = statistics.fmean(y for _, y in points)
+  spread = sum((x - mean_x)**2 for x, _ in points)
+  if not spread:
+    return None
+  return sum((x - mean_x) * (y - mean_y) for x, y in points) / spread
+
+
+def get_calibration_time() -> float:
+  # Best time of a fixed pure Python loop, taken next to each measurement so
+  # timings can be normalised for machine speed drift between runs
+  times = []
+  for _ in range(_CALIBRATION_REPEATS):
+    start_time = time.perf_counter()
+    total = 0
+    for value in range(_CALIBRATION_LOOPS):
+      total += value*value
+    times.append(time.perf_counter() - start_time)
+  return min(times)
+
+
+def time_runs(solve_fn: Callable[[], Any], repeats: int) -> list[float]:
+  # Garbage collection is off while timing, as in timeit, so collections
+  # triggered by earlier runs do not land in later ones
+  times = []
+  gc.collect()
+  gc.disable()
+  try:
+    for _ in range(repeats):
+      start_time = time.perf_counter()
+      solve_fn()
+      times.append(time.perf_counter() - start_time)
+  finally:
+    gc.enable()
+  return times
+
+
+def benchmark_day(
+    module_name: str,
+    sizes: Sequence[int],
+    repeats: int,
+    seed: int,
+    work_dir: str,
+) -> dict[str, Any]:
+  module = importlib.import_module(module_name)
+  generator = _GENERATORS[module_name][0]
+  runs = []
+  for size in sizes:
+    file_name = os.path.join(work_dir, f'{module_name}_{size}.txt')
+    with open(file_name, 'w') as open_file:
+      open_file.write(generator(size, random.Random(seed * 1_000_003 + size)))
+
+    calibration = get_calibration_time()
+    times = time_runs(lambda: module.main(file_name), repeats)
+
+    # Tracing slows everything down, so peak memory gets its own run
+    tracemalloc.start()
+    module.main(file_name)
+    peak_memory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    times.sort()
+    runs.append({
+      'size': size,
+      'input_bytes': os.path.getsize(file_name),
+      'median': statistics.median(times),
+      'p10': get_percentile(times, 0.1),
+      'p90': get_percentile(times, 0.9),
+      'min': times[0],
+      'max': times[-1],
+      'peak_memory': peak_memory,
+      'calibration': calibration,
+    })
+
+  return {
+    'runs': runs,
+    # Fitted against input bytes rather than the generator size, which is a
+    # side length for the grid days, so exponents compare across days. Best
+    # times are the least disturbed by other load.
+    'exponent': fit_scaling_exponent(
+      [run['input_bytes'] for run in runs],
+      [run['min'] for run in runs],
+    ),
+  }
+
+
+def run_benchmarks(
+    module_names: Sequence[str],
+    num_steps: int,
+    factor: float,
+    scale: float,
+    repeats: int,
+    seed: int,
+) -> dict[str, Any]:
+  results = {}
+  with tempfile.TemporaryDirectory() as work_dir:
+    for module_name in module_names:
+      base_size = max(1, round(_GENERATORS[module_name][1] * scale))
+      sizes = get_size_sweep(base_size, num_steps, factor)
+      results[module_name] = benchmark_day(module_name, sizes, repeats, seed, work_dir)
+      print_day_results(module_name, results[module_name])
+  return {
+    'python': platform.python_version(),
+    'machine': platform.machine(),
+    'repeats': repeats,
+    'seed': seed,
+    'days': results,
+  }
+
+
+def print_day_results(module_name: str, day_results: dict[str, Any]):
+  exponent = day_results['exponent']
+  exponent_text = '-' if exponent is None else f'{exponent:.2f}'
+  print(f"{module_name}  scaling exponent {exponent_text} against input bytes")
+  for run in day_results['runs']:
+    print(
+      f"  size {run['size']:>8}  median {run['median']*1e3:9.2f} ms  "
+      f"p10 {run['p10']*1e3:9.2f} ms  p90 {run['p90']*1e3:9.2f} ms  "
+      f"peak {run['peak_memory']/2**20:8.2f} MiB"
+    )
+
+
+def compare_results(
+    baseline: dict[str, Any],
+    current: dict[str, Any],
+    tolerance: float = _DEFAULT_TOLERANCE,
+) -> list[str]:
+  # Only sizes present in both runs are compared. Times are divided by the
+  # calibration time taken next to them, and a slowdown needs the new p10 above
+  # the baseline p90 by more than tolerance. Even then, identical code on a
+  # shared machine was seen up to 1.5x apart, hence the wide default margins.
+  # Peak memory is near deterministic, so it gets a tight fixed margin.
+  regressions = []
+  for module_name, day_results in current['days'].items():
+    baseline_day = baseline['days'].get(module_name)
+    if baseline_day is None:
+      continue
+    baseline_runs = {run['size']: run for run in baseline_day['runs']}
+    for run in day_results['runs']:
+      baseline_run = baseline_runs.get(run['size'])
+      if baseline_run is None:
+        continue
+      slowdown = (
+        (run['p10'] / run['calibration']) /
+        (baseline_run['p90'] / baseline_run['calibration'])
+      )
+      if slowdown > 1 + tolerance:
+        regressions.append(
+          f"{module_name} size {run['size']}: p10 {run['p10']:.6g} s against baseline "
+          f"p90 {baseline_run['p90']:.6g} s, {slowdown:.2f}x after calibration"
+        )
+      if run['peak_memory'] > baseline_run['peak_memory'] * (1 + _MEMORY_TOLERANCE):
+        regressions.append(
+          f"{module_name} size {run['size']}: peak memory {baseline_run['peak_memory']} -> "
+          f"{run['peak_memory']} bytes"
+        )
+    old_exponent, new_exponent = baseline_day['exponent'], day_results['exponent']
+    if (
+        old_exponent is not None and new_exponent is not None
+        and new_exponent > old_exponent + _EXPONENT_TOLERANCE
+    ):
+      regressions.append(
+        f"{module_name}: scaling exponent {old_exponent:.2f} -> {new_exponent:.2f}"
+      )
+  return regressions
+
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description="Benchmark every day on generated inputs")
+  parser.add_argument('days', nargs='*', type=int, help="Days to benchmark, all when omitted")
+  parser.add_argument('--steps', type=int, default=4, help="Sizes in the geometric sweep")
+  parser.add_argument('--factor', type=float, default=2., help="Ratio between consecutive sizes")
+  parser.add_argument('--scale', type=float, default=1., help="Multiplier on every day's smallest size")
+  parser.add_argument('--repeats', type=int, default=5, help="Timed runs per size")
+  parser.add_argument('--seed', type=int, default=0, help="Seed for the input generators")
+  parser.add_argument('--output', help="Write the results to this JSON file")
+  parser.add_argument('--compare', help="Flag regressions against this JSON results file")
+  parser.add_argument(
+    '--tolerance',
+    type=float,
+    default=_DEFAULT_TOLERANCE,
+    help="Margin of the calibrated p10 time over the baseline p90 before flagging a regression",
+  )
+  args = parser.parse_args()
+  if args.repeats < 1 or args.steps < 1:
+    raise ValueError("Both --repeats and --steps must be at least 1")
+
+  sys.path.insert(0, _SCRIPT_DIR)
+  module_names = sorted(_GENERATORS)
+  if args.days:
+    module_names = [f'day_{day:02d}' for day in args.days]
+    unknown = [name for name in module_names if name not in _GENERATORS]
+    if unknown:
+      raise ValueError(f"No generator for {unknown}. Expected one of {sorted(_GENERATORS)}")
+
+  results = run_benchmarks(
+    module_names,
+    args.steps,
+    args.factor,
+    args.scale,
+    args.repeats,
+    args.seed,
+  )
+
+  if args.output:
+    with open(args.output, 'w') as open_file:
+      json.dump(results, open_file, indent=2)
+
+  if args.compare:
+    with open(args.compare, 'r') as open_file:
+      regressions = compare_results(json.load(open_file), results, args.tolerance)
+    for regression in regressions:
+      print(f"REGRESSION {regression}")
+    if regressions:
+      sys.exit(1)
+    print("No regressions")
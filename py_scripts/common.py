@@ -1,40 +1,275 @@
 
-from typing import Callable, Any, Final, Sequence, TypeVar, Iterable
+from typing import Callable, Any, Final, Sequence, TypeVar, Iterable, Iterator
 import time
 from collections import defaultdict
+from array import array
 import bisect
+import heapq
+import itertools
+import mmap
+import operator
+import os
+import random
+import re
+import tempfile
+import tracemalloc
 
 _IDENTITY: Final = lambda x: x
 _T = TypeVar('_T')
+_BLANK_LINE_PATTERN: Final = re.compile(rb'^[ \t\r\x0b\x0c]*\n', re.MULTILINE)
+_BLANK_LINES_PREFIX_PATTERN: Final = re.compile(rb'(?:[ \t\r\x0b\x0c]*(?:\n|\Z))+')
 COMPLEX_DOWN = (-1j)
 COMPLEX_UP = (1j)
 COMPLEX_LEFT = (-1+0j)
 COMPLEX_RIGHT = (1+0j)
 
 
+class MappedFile:
+  # Read-only memory map of a file, exposing the raw bytes as a memoryview and
+  # lines as undecoded bytes, so large inputs are not decoded and copied whole.
+  def __init__(self, file_name: str):
+    self.file_name = file_name
+    self._file = open(file_name, 'rb')
+    if os.fstat(self._file.fileno()).st_size == 0:
+      self._map = b''
+    else:
+      self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+    self.view = memoryview(self._map)
+    self._line_offsets = None
+
+  def close(self):
+    self.view.release()
+    if isinstance(self._map, mmap.mmap):
+      self._map.close()
+    self._file.close()
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, *exc_info):
+    self.close()
+
+  @property
+  def line_offsets(self) -> array:
+    # Start offset of every line, plus one past the end of the last line
+    if self._line_offsets is None:
+      offsets = array('q', [0])
+      data = self._map
+      pos = data.find(b'\n')
+      while pos != -1:
+        offsets.append(pos+1)
+        pos = data.find(b'\n', pos+1)
+      if offsets[-1] != len(data):
+        offsets.append(len(data)+1)
+      self._line_offsets = offsets
+    return self._line_offsets
+
+  def __len__(self) -> int:
+    return len(self.line_offsets) - 1
+
+  def line_view(self, index: int) -> memoryview:
+    offsets = self.line_offsets
+    return self.view[offsets[index]:offsets[index+1]-1]
+
+  def line(self, index: int) -> bytes:
+    offsets = self.line_offsets
+    return self._map[offsets[index]:offsets[index+1]-1]
+
+  def iter_lines(self) -> Iterator[bytes]:
+    # Streams lines without building the offset table
+    data = self._map
+    start = 0
+    while start < len(data):
+      end = data.find(b'\n', start)
+      if end == -1:
+        end = len(data)
+      yield data[start:end]
+      start = end+1
+
+  def iter_parsed(
+      self,
+      parse_fn: Callable[[str], Any] = _IDENTITY,
+  ) -> Iterator[Any]:
+    for line in self.iter_lines():
+      yield parse_fn(line.decode().strip())
+
+  def iter_blocks(self, chunk_size: int = 1 << 20) -> Iterator[bytes]:
+    # Consecutive blocks of about chunk_size bytes, each cut just after a
+    # newline so no line is split between blocks
+    data = self._map
+    start = 0
+    while start < len(data):
+      end = len(data)
+      if start + chunk_size < end:
+        end = data.rfind(b'\n', start, start+chunk_size) + 1
+        if end <= start:
+          end = data.find(b'\n', start+chunk_size) + 1 or len(data)
+      yield data[start:end]
+      start = end
+
+
 def read_raw_file(
-    file_name: str
+    file_name: str,
+    *,
+    use_mmap: bool = False,
 ) -> str:
+  if use_mmap:
+    with MappedFile(file_name) as mapped_file:
+      return str(mapped_file.view, 'utf-8')
   with open(file_name, 'r') as open_file:
     return open_file.read()
 
 
+def read_raw_bytes(
+    file_name: str
+) -> bytes:
+  with open(file_name, 'rb') as open_file:
+    return open_file.read()
+
+
+def iter_parsed(
+    file_name: str,
+    parse_fn: Callable[[str], Any] = _IDENTITY,
+    *,
+    use_mmap: bool = False,
+) -> Iterator[Any]:
+  if use_mmap:
+    open_file = MappedFile(file_name)
+    lines = (line.decode() for line in open_file.iter_lines())
+  else:
+    open_file = open(file_name, 'r')
+    lines = open_file
+  with open_file:
+    for line_number, line in enumerate(lines, start=1):
+      line = line.strip()
+      try:
+        parsed = parse_fn(line)
+      except Exception as err:
+        raise ValueError(f"Could not parse line {line_number} of {file_name}: {line!r}") from err
+      yield parsed
+
+
 def read_and_parse_file(
     file_name: str,
-    parse_fn: Callable[[str], Any] = lambda x: x
+    parse_fn: Callable[[str], Any] = lambda x: x,
+    *,
+    use_mmap: bool = False,
+    stream: bool = False,
 ):
-  with open(file_name, 'r') as open_file:
-    data = [parse_fn(line.strip()) for line in open_file]
+  if stream:
+    return iter_parsed(file_name, parse_fn, use_mmap=use_mmap)
+  data = list(iter_parsed(file_name, parse_fn, use_mmap=use_mmap))
   if len(data) == 1:
      return data[0]
   return data
 
 
+def iter_file_sections(
+    file_name: str,
+    parse_fns: Sequence[Callable[[str], Any]],
+) -> Iterator[Iterator[Any]]:
+  # Yields one lazy generator per blank line separated section, using
+  # parse_fns[i] for section i. Unconsumed lines are skipped on advancing.
+  with open(file_name, 'r') as open_file:
+    lines = (line.strip() for line in open_file)
+    at_end_of_file = False
+
+    def parse_section(parse_fn: Callable[[str], Any]) -> Iterator[Any]:
+      nonlocal at_end_of_file
+      for line in lines:
+        if not line:
+          return
+        yield parse_fn(line)
+      at_end_of_file = True
+
+    section_idx = 0
+    while not at_end_of_file:
+      if section_idx >= len(parse_fns):
+        raise ValueError(f"Found more than {len(parse_fns)} sections in {file_name}")
+      section = parse_section(parse_fns[section_idx])
+      yield section
+      for _ in section:
+        pass
+      section_idx += 1
+
+
+def iter_int_sections(
+    file_name: str,
+    separator: bytes | None = None,
+    chunk_size: int = 1 << 20,
+) -> Iterator[Iterator[tuple[int, ...]]]:
+  # Fast path of iter_file_sections for integer records. The memory mapped file
+  # is read in line-aligned blocks of about chunk_size bytes, each tokenised by
+  # a single split, so memory is bounded by the block size and not the file.
+  # Runs of blank lines separate sections, which are consumed in order as with
+  # iter_file_sections.
+  with MappedFile(file_name) as mapped_file:
+    blocks = mapped_file.iter_blocks(chunk_size)
+    pending = b''
+    line_number = 1
+
+    def skip_blank_lines() -> bool:
+      # False once only blank lines were left
+      nonlocal pending, line_number
+      while True:
+        if not pending:
+          pending = next(blocks, b'')
+          if not pending:
+            return False
+        blank_lines = _BLANK_LINES_PREFIX_PATTERN.match(pending)
+        if not blank_lines:
+          return True
+        line_number += pending.count(b'\n', 0, blank_lines.end())
+        pending = pending[blank_lines.end():]
+
+    def parse_section() -> Iterator[tuple[int, ...]]:
+      # Blocks start at a line, so a blank line at the start of a new block
+      # still ends the section
+      nonlocal pending, line_number
+      num_fields = None
+      while True:
+        if not pending:
+          pending = next(blocks, b'')
+          if not pending:
+            return
+        blank_line = _BLANK_LINE_PATTERN.search(pending)
+        if blank_line is None:
+          chunk, pending = pending, b''
+        else:
+          chunk, pending = pending[:blank_line.start()], pending[blank_line.start():]
+        if separator is not None:
+          chunk = chunk.replace(separator, b' ')
+        if num_fields is None:
+          first_line_end = chunk.find(b'\n')
+          num_fields = len(chunk[:first_line_end if first_line_end != -1 else None].split())
+        tokens = chunk.split()
+        # Only the end of the file can leave an unterminated last line
+        num_lines = chunk.count(b'\n') + bool(chunk[chunk.rfind(b'\n')+1:].strip())
+        if len(tokens) != num_lines*num_fields:
+          raise ValueError(
+            f"Found {len(tokens)} values over lines {line_number}-{line_number+num_lines-1} "
+            f"of {file_name}, expected {num_fields} per line"
+          )
+        line_number += num_lines
+        yield from zip(*[map(int, tokens)]*num_fields)
+        if blank_line is not None:
+          return
+
+    while skip_blank_lines():
+      section = parse_section()
+      yield section
+      for _ in section:
+        pass
+
+
 def read_and_parse_multicolumn_file(
     file_name: str,
     parse_fns: Sequence[Callable[[str], Any] | None] = [lambda x: x],
     separator: str | None = None,
-    exclude_empty: bool = True
+    exclude_empty: bool = True,
+    *,
+    use_mmap: bool = False,
+    stream: bool = False,
 ):
   for idx, fn in enumerate(parse_fns):
     if fn is None:
@@ -49,21 +284,58 @@ def read_and_parse_multicolumn_file(
               zip(parse_fns, line.split(separator), strict=True)
             ]
 
-  return read_and_parse_file(file_name, parse_fn)
+  return read_and_parse_file(file_name, parse_fn, use_mmap=use_mmap, stream=stream)
+
+
+def read_multicolumn_file_as_arrays(
+    file_name: str,
+    typecodes: str,
+    separator: str | None = None,
+) -> list[array]:
+  # One typed array per column, e.g. typecodes='qqq' for three int64 columns.
+  # Lines are tokenised as undecoded bytes and blank lines are skipped.
+  with MappedFile(file_name) as mapped_file:
+    raw_data = mapped_file.view.tobytes()
+  if separator is not None:
+    raw_data = raw_data.replace(separator.encode(), b' ')
+
+  num_columns = len(typecodes)
+  tokens = []
+  for line_num, line in enumerate(raw_data.split(b'\n'), 1):
+    line_tokens = line.split()
+    if not line_tokens:
+      continue
+    if len(line_tokens) != num_columns:
+      raise ValueError(
+        f"Found {len(line_tokens)} values on line {line_num} of {file_name}, "
+        f"expected {num_columns} columns"
+      )
+    tokens += line_tokens
+  columns = []
+  for col, typecode in enumerate(typecodes):
+    cast = float if typecode in 'fd' else int
+    columns.append(array(typecode, map(cast, tokens[col::num_columns])))
+  return columns
 
 
 def read_and_parse_grid_to_dict(
     file_name: str,
     *,
     default_return: str | None = None,
+    use_mmap: bool = False,
 ) -> dict[complex, str]:
   if default_return is not None:
     map_content_by_coord = defaultdict(lambda: default_return)
   else:
     map_content_by_coord = dict()
-  with open(file_name, 'r') as open_file:
-    for row, line in enumerate(open_file):
-        line = line.strip()
+  if use_mmap:
+    open_file = MappedFile(file_name)
+    lines = open_file.iter_parsed()
+  else:
+    open_file = open(file_name, 'r')
+    lines = (line.strip() for line in open_file)
+  with open_file:
+    for row, line in enumerate(lines):
         for col, char in enumerate(line):
           pos = col - row*1j
           map_content_by_coord[pos] = char
@@ -79,6 +351,157 @@ def get_complex_directions(
       yield from (1+1j, 1-1j, -1+1j, -1-1j)
 
 
+# Row-major bytearray grid with a one cell border, so neighbours of real cells
+# are always valid indices. Complex positions follow read_and_parse_grid_to_dict.
+class Grid:
+  def __init__(
+      self,
+      lines: Sequence[str | bytes],
+      *,
+      border: str = ' ',
+  ):
+    if len(border) != 1:
+      raise ValueError(f"Expected border to be one character, got {border}")
+    self.border = border
+    self.border_byte = ord(border)
+    self.height = len(lines)
+    self.width = max((len(line) for line in lines), default=0)
+    self.stride = self.width + 2
+
+    border_bytes = border.encode()
+    rows = [border_bytes*self.stride]
+    for line in lines:
+      if isinstance(line, str):
+        line = line.encode()
+      rows.append(b''.join((border_bytes, line.ljust(self.width, border_bytes), border_bytes)))
+    rows.append(border_bytes*self.stride)
+    self.cells = bytearray(b''.join(rows))
+
+    stride = self.stride
+    self._orthogonal_offsets = (1, -stride, -1, stride)
+    self._diagonal_offsets = (1-stride, 1+stride, -1-stride, -1+stride)
+
+  def index(self, row: int, col: int) -> int:
+    return (row+1)*self.stride + col + 1
+
+  def row_col(self, index: int) -> tuple[int, int]:
+    row, col = divmod(index, self.stride)
+    return row-1, col-1
+
+  def index_of(self, pos: complex) -> int:
+    return self.index(-int(pos.imag), int(pos.real))
+
+  def position_of(self, index: int) -> complex:
+    row, col = self.row_col(index)
+    return col - row*1j
+
+  def in_bounds(self, row: int, col: int) -> bool:
+    return 0 <= row < self.height and 0 <= col < self.width
+
+  def neighbor_offsets(
+      self,
+      *,
+      include_diagonals=False
+  ) -> tuple[int, ...]:
+    # Same order as get_complex_directions
+    if include_diagonals:
+      return self._orthogonal_offsets + self._diagonal_offsets
+    return self._orthogonal_offsets
+
+  def indices(self) -> Iterator[int]:
+    for row in range(self.height):
+      start = self.index(row, 0)
+      yield from range(start, start+self.width)
+
+  def row_slice(self, row: int) -> slice:
+    start = self.index(row, 0)
+    return slice(start, start+self.width)
+
+  def find(self, char: str) -> int:
+    index = self.cells.find(char.encode())
+    if index == -1:
+      raise ValueError(f"Could not find {char} in grid")
+    return index
+
+  def count(self, char: str) -> int:
+    return self.cells.count(char.encode())
+
+  def mask(self, char: str) -> bytes:
+    table = bytearray(256)
+    table[ord(char)] = 1
+    return self.cells.translate(table)
+
+  def count_neighbors(
+      self,
+      char: str,
+      *,
+      include_diagonals=False
+  ) -> bytes:
+    # Each cell is a byte lane of one big int, so adding shifted copies of the
+    # mask sums every neighbourhood at once. Counts never exceed 8, so no lane
+    # carries into the next. Values on the border lanes are meaningless.
+    num_cells = len(self.cells)
+    mask = int.from_bytes(self.mask(char), 'little')
+    total = 0
+    for offset in self.neighbor_offsets(include_diagonals=include_diagonals):
+      if offset > 0:
+        total += mask >> (8*offset)
+      else:
+        total += mask << (-8*offset)
+    total &= (1 << (8*num_cells)) - 1
+    return total.to_bytes(num_cells, 'little')
+
+  def get(self, pos: complex, default: str | None = None) -> str | None:
+    row, col = -int(pos.imag), int(pos.real)
+    if not self.in_bounds(row, col):
+      return default
+    return chr(self.cells[self.index(row, col)])
+
+  def __getitem__(self, pos: complex) -> str:
+    value = self.get(pos)
+    if value is None:
+      raise KeyError(pos)
+    return value
+
+  def __setitem__(self, pos: complex, char: str):
+    row, col = -int(pos.imag), int(pos.real)
+    if not self.in_bounds(row, col):
+      raise KeyError(pos)
+    self.cells[self.index(row, col)] = ord(char)
+
+  def __contains__(self, pos: complex) -> bool:
+    return self.in_bounds(-int(pos.imag), int(pos.real))
+
+  def __len__(self) -> int:
+    return self.width*self.height
+
+  def keys(self) -> Iterator[complex]:
+    return (self.position_of(index) for index in self.indices())
+
+  def values(self) -> Iterator[str]:
+    return (chr(self.cells[index]) for index in self.indices())
+
+  def items(self) -> Iterator[tuple[complex, str]]:
+    return ((self.position_of(index), chr(self.cells[index])) for index in self.indices())
+
+
+def read_and_parse_grid(
+    file_name: str,
+    *,
+    border: str = ' ',
+    use_mmap: bool = False,
+) -> Grid:
+  if use_mmap:
+    with MappedFile(file_name) as mapped_file:
+      lines = [line.strip() for line in mapped_file.iter_lines()]
+  else:
+    with open(file_name, 'rb') as open_file:
+      lines = [line.strip() for line in open_file]
+  while lines and not lines[-1]:
+    lines.pop()
+  return Grid(lines, border=border)
+
+
 def pretty_format_and_maybe_check(
     answer: _T,
     part: int,
@@ -169,6 +592,123 @@ def print_complex_grid(
     print()
 
 
+def _sweep_sorted_intervals(
+    sorted_ranges: Iterable[tuple[int, int]],
+    coalesce_touching: bool,
+) -> list[tuple[int, int]]:
+  gap = 1 if coalesce_touching else 0
+  merged = []
+  current_start = current_end = None
+  for start, end in sorted_ranges:
+    if current_end is not None and start <= current_end + gap:
+      current_end = max(current_end, end)
+      continue
+    if current_end is not None:
+      merged.append((current_start, current_end))
+    current_start, current_end = start, end
+  if current_end is not None:
+    merged.append((current_start, current_end))
+  return merged
+
+
+def merge_intervals(
+    ranges: Iterable[tuple[int, int]],
+    *,
+    coalesce_touching: bool = False,
+) -> list[tuple[int, int]]:
+  # One sort and one sweep, O(n log n) overall
+  return _sweep_sorted_intervals(sorted(ranges), coalesce_touching)
+
+
+class IntervalIndex:
+  def __init__(
+      self,
+      ranges: Iterable[tuple[int, int]],
+  ):
+    # Expects sorted, disjoint, inclusive ranges such as merged range output
+    self._starts: list[int] = []
+    self._ends: list[int] = []
+    for start, end in ranges:
+      if end < start:
+        raise ValueError(f"Range end before start in {start}-{end}")
+      if self._ends and start <= self._ends[-1]:
+        raise ValueError(
+          f"Expected sorted disjoint ranges, got {start}-{end} after "
+          f"{self._starts[-1]}-{self._ends[-1]}"
+        )
+      self._starts.append(start)
+      self._ends.append(end)
+
+  def contains(self, number: int) -> bool:
+    idx = bisect.bisect_right(self._starts, number) - 1
+    return idx >= 0 and number <= self._ends[idx]
+
+  def contains_many(self, numbers: Iterable[int]) -> list[bool]:
+    # Sorting the queries lets one sweep over the ranges answer all of them
+    numbers = list(numbers)
+    results = [False]*len(numbers)
+    num_ranges = len(self._starts)
+    idx = 0
+    for query_idx in sorted(range(len(numbers)), key=numbers.__getitem__):
+      number = numbers[query_idx]
+      while idx < num_ranges and self._ends[idx] < number:
+        idx += 1
+      if idx == num_ranges:
+        break
+      results[query_idx] = self._starts[idx] <= number
+    return results
+
+  def count_covered(self) -> int:
+    return sum(self._ends) - sum(self._starts) + len(self._starts)
+
+  def __contains__(self, number: int) -> bool:
+    return self.contains(number)
+
+  def __len__(self) -> int:
+    return len(self._starts)
+
+  def __iter__(self) -> Iterator[tuple[int, int]]:
+    return zip(self._starts, self._ends)
+
+
+class DisjointSet:
+  def __init__(self, num_elements: int):
+    self._parents = list(range(num_elements))
+    self._sizes = [1]*num_elements
+    self.component_count = num_elements
+
+  def find(self, element: int) -> int:
+    root = element
+    while self._parents[root] != root:
+      root = self._parents[root]
+    while self._parents[element] != root:
+      self._parents[element], element = root, self._parents[element]
+    return root
+
+  def union(self, element_a: int, element_b: int) -> bool:
+    root_a, root_b = self.find(element_a), self.find(element_b)
+    if root_a == root_b:
+      return False
+    if self._sizes[root_a] < self._sizes[root_b]:
+      root_a, root_b = root_b, root_a
+    self._parents[root_b] = root_a
+    self._sizes[root_a] += self._sizes[root_b]
+    self.component_count -= 1
+    return True
+
+  def component_size(self, element: int) -> int:
+    return self._sizes[self.find(element)]
+
+  def largest_component_sizes(self, k: int) -> list[int]:
+    return heapq.nlargest(
+      k,
+      (size for root, (parent, size) in enumerate(zip(self._parents, self._sizes)) if root == parent)
+    )
+
+  def __len__(self) -> int:
+    return len(self._parents)
+
+
 class SortedLookupList:
   def __init__(
       self,
@@ -197,13 +737,156 @@ class SortedLookupList:
   def pop(self, index: int = -1):
     element = self._list.pop(index)
     self._counts[element] -= 1
+    if not self._counts[element]:
+      del self._counts[element]
     return element
 
   def __contains__(self, element: _T):
-    return element in self._counts
+    return self._counts.get(element, 0) > 0
+
+
+class MergingHeap:
+  # Binary min-heap of unique items. Pushing an item already present merges the
+  # values with merge_fn and keeps the lower priority (decrease-key), leaving
+  # the superseded heap entry to be skipped lazily on pop.
+  def __init__(
+      self,
+      merge_fn: Callable[[Any, Any], Any] = operator.add,
+  ):
+    self._heap: list[tuple[Any, int, Any]] = []
+    self._entries: dict[Any, tuple[Any, int, Any]] = {}
+    self._counter = itertools.count()
+    self._merge_fn = merge_fn
+
+  def push(self, item: Any, priority: Any, value: Any = 0):
+    existing = self._entries.get(item)
+    if existing is not None:
+      old_priority, old_count, old_value = existing
+      value = self._merge_fn(old_value, value)
+      if not priority < old_priority:
+        self._entries[item] = (old_priority, old_count, value)
+        return
+    count = next(self._counter)
+    self._entries[item] = (priority, count, value)
+    heapq.heappush(self._heap, (priority, count, item))
+
+  def pop(self) -> tuple[Any, Any, Any]:
+    while self._heap:
+      priority, count, item = heapq.heappop(self._heap)
+      entry = self._entries.get(item)
+      if entry is not None and entry[1] == count:
+        del self._entries[item]
+        return item, priority, entry[2]
+    raise IndexError("pop from empty MergingHeap")
+
+  def __contains__(self, item: Any) -> bool:
+    return item in self._entries
+
+  def __len__(self) -> int:
+    return len(self._entries)
+
+
+class BucketQueue:
+  # Monotone priority queue for small non-negative int priorities, such as row
+  # numbers. Pushes below the last popped priority are rejected. Duplicate
+  # items merge as in MergingHeap. Push and pop are O(1) amortised.
+  def __init__(
+      self,
+      merge_fn: Callable[[Any, Any], Any] = operator.add,
+  ):
+    self._buckets: list[dict[Any, Any]] = []
+    self._priorities: dict[Any, int] = {}
+    self._current_priority = 0
+    self._merge_fn = merge_fn
+
+  def push(self, item: Any, priority: int, value: Any = 0):
+    if priority < self._current_priority:
+      raise ValueError(
+        f"Priority {priority} is below the current priority {self._current_priority}"
+      )
+    existing_priority = self._priorities.get(item)
+    if existing_priority is not None:
+      value = self._merge_fn(self._buckets[existing_priority].pop(item), value)
+      priority = min(priority, existing_priority)
+    while len(self._buckets) <= priority:
+      self._buckets.append({})
+    self._buckets[priority][item] = value
+    self._priorities[item] = priority
+
+  def pop(self) -> tuple[Any, int, Any]:
+    while self._current_priority < len(self._buckets):
+      bucket = self._buckets[self._current_priority]
+      if bucket:
+        item, value = bucket.popitem()
+        del self._priorities[item]
+        return item, self._current_priority, value
+      self._current_priority += 1
+    raise IndexError("pop from empty BucketQueue")
+
+  def __contains__(self, item: Any) -> bool:
+    return item in self._priorities
+
+  def __len__(self) -> int:
+    return len(self._priorities)
 
 
 if __name__ == "__main__":
+  # Both section readers agree on a small two-section file
+  with tempfile.TemporaryDirectory() as temp_dir:
+    sections_file = os.path.join(temp_dir, 'sections.txt')
+    with open(sections_file, 'w') as open_file:
+      open_file.write('3-5\n10-14\n16-20\n\n1\n5\n8\n')
+    sections = iter_file_sections(
+      sections_file,
+      [lambda line: tuple(map(int, line.split('-'))), lambda line: (int(line),)],
+    )
+    expected_sections = [list(next(sections)), list(next(sections))]
+    assert next(sections, None) is None
+    assert expected_sections == [[(3, 5), (10, 14), (16, 20)], [(1,), (5,), (8,)]]
+    for chunk_size in (1, 4, 1 << 20):
+      int_sections = iter_int_sections(sections_file, b'-', chunk_size)
+      assert [list(section) for section in int_sections] == expected_sections
+
+    # Integer sections stream, so peak memory stays far below the file size
+    large_file = os.path.join(temp_dir, 'large.txt')
+    with open(large_file, 'w') as open_file:
+      open_file.write(''.join(f'{num}-{num+7}\n' for num in range(10**6, 10**6 + 100000)))
+      open_file.write('\n\n')
+      open_file.write(''.join(f'{num}\n' for num in range(100000)))
+    tracemalloc.start()
+    sections = iter_int_sections(large_file, b'-', 1 << 12)
+    range_total = sum(end-start for start, end in next(sections))
+    id_total = sum(num for num, in next(sections))
+    assert next(sections, None) is None
+    peak_memory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    assert (range_total, id_total) == (7*100000, sum(range(100000)))
+    assert peak_memory < os.path.getsize(large_file) // 16
+
+  # Both merging queues pop the same (item, lowest priority, summed value)
+  # records as a brute-force dict, in priority order
+  rng = random.Random(0)
+  brute_force: dict[int, tuple[int, int]] = {}
+  merging_heap, bucket_queue = MergingHeap(), BucketQueue()
+  for _ in range(500):
+    item, priority, value = rng.randrange(50), rng.randrange(20), rng.randrange(100)
+    old_priority, old_value = brute_force.get(item, (priority, 0))
+    brute_force[item] = (min(old_priority, priority), old_value + value)
+    merging_heap.push(item, priority, value)
+    bucket_queue.push(item, priority, value)
+  assert len(merging_heap) == len(bucket_queue) == len(brute_force)
+  for queue in (merging_heap, bucket_queue):
+    popped = [queue.pop() for _ in range(len(brute_force))]
+    assert not queue
+    assert [priority for _, priority, _ in popped] == sorted(priority for priority, _ in brute_force.values())
+    assert {item: (priority, value) for item, priority, value in popped} == brute_force
+
+  # Pushing an item twice without a value merges the default values
+  for queue in (MergingHeap(), BucketQueue()):
+    queue.push('item', 3)
+    queue.push('item', 2)
+    assert queue.pop() == ('item', 2, 0)
+
   # Test parsing function
   data = read_and_parse_multicolumn_file(
     'data/test_data.txt',
@@ -1,10 +1,18 @@
 
-from typing import Final
+from typing import Final, Iterable, Iterator, Sequence
+from array import array
 import enum
+import itertools
+import random
+import re
 
 import common
 
 _DATA_FILE_NAME: Final = 'data/day_01.txt'
+_SIGN_TABLE: Final = bytes.maketrans(b'LR', b'-+')
+_INLINE_WHITESPACE: Final = b' \t\r\x0b\x0c'
+_INSTRUCTION_BYTES: Final = b'LR0123456789\n' + _INLINE_WHITESPACE
+_INSTRUCTION_PATTERN: Final = re.compile(rb'[LR][0-9]+')
 
 
 class Direction(enum.Enum):
@@ -39,25 +47,163 @@ def rotate_dial(
 
 
 def dial_position_generator(
-    instructions: tuple[Direction, int],
+    instructions: Iterable[tuple[Direction, int] | int],
     start_position: int = 50
 ):
+  # Also accepts signed steps, as from parse_instruction_bytes
   position = start_position
   for instruction in instructions:
+    if isinstance(instruction, int):
+      instruction = step_to_instruction(instruction)
     position, hidden_zeros = rotate_dial(position, instruction)
     yield position, hidden_zeros
 
 
-if __name__ == "__main__":
+def instruction_to_step(instruction: tuple[Direction, int]) -> int:
+  direction, count = instruction
+  return count if direction == Direction.RIGHT else -count
+
+
+def step_to_instruction(step: int) -> tuple[Direction, int]:
+  return (Direction.RIGHT, step) if step >= 0 else (Direction.LEFT, -step)
+
+
+def _are_signed_steps(raw_data: bytes, tokens: Sequence[bytes]) -> bool:
+  # True when every token is one sign followed by digits. Each direction became
+  # one sign, so this holds exactly when there are as many tokens as directions,
+  # each starting with a sign, and none is a bare sign.
+  joined = b'\n' + b'\n'.join(tokens) + b'\n'
+  num_directions = raw_data.count(b'L') + raw_data.count(b'R')
+  return (
+    not raw_data.translate(None, _INSTRUCTION_BYTES)
+    and joined.count(b'\n+') + joined.count(b'\n-') == len(tokens) == num_directions
+    and b'+\n' not in joined
+    and b'-\n' not in joined
+  )
+
+
+def parse_instruction_bytes(
+    raw_data: bytes,
+    first_line_number: int = 1,
+) -> array:
+  # L/R become the sign of each number and whitespace within lines is dropped,
+  # so one translate and split gives one token per line, checked in bulk and
+  # parsed into signed steps. Lines are only scanned one by one to report errors.
+  tokens = raw_data.translate(_SIGN_TABLE, _INLINE_WHITESPACE).split()
+  if not _are_signed_steps(raw_data, tokens):
+    for line_number, line in enumerate(raw_data.split(b'\n'), first_line_number):
+      instruction = line.translate(None, _INLINE_WHITESPACE)
+      if instruction and not _INSTRUCTION_PATTERN.fullmatch(instruction):
+        raise ValueError(
+          f"Could not parse instruction {line.strip().decode(errors='replace')} on line "
+          f"{line_number}. Expected one of {list(Direction)} followed by a count"
+        )
+  return array('q', map(int, tokens))
+
+
+def iter_instruction_step_chunks(
+    file_name: str,
+    chunk_size: int = 1 << 20,
+) -> Iterator[array]:
+  # Reads chunk_size bytes at a time, cut back to the last whole line
+  with open(file_name, 'rb') as open_file:
+    remainder = b''
+    line_number = 1
+    while block := open_file.read(chunk_size):
+      block = remainder + block
+      cut = block.rfind(b'\n') + 1
+      remainder = block[cut:]
+      if cut:
+        yield parse_instruction_bytes(block[:cut], line_number)
+        line_number += block.count(b'\n', 0, cut)
+    if remainder.strip():
+      yield parse_instruction_bytes(remainder, line_number)
+
+
+def encode_instructions(
+    instructions: Iterable[tuple[Direction, int]]
+) -> array:
+  return array('q', map(instruction_to_step, instructions))
+
+
+def count_zero_passes(
+    steps: Sequence[int],
+    start_position: int = 50
+) -> tuple[int, int, int]:
+  # Works on the unwrapped prefix sums P of the signed steps. A right turn
+  # points at 0 once per multiple of 100 in (P_prev, P] and a left turn once
+  # per multiple in [P, P_prev), which covers starting and ending on 0.
+  # Returns the final position, the count of steps ending on 0 and the total
+  # count of times the dial pointed at 0.
+  absolute_positions = list(itertools.accumulate(steps, initial=start_position))
+  hundreds = [pos // 100 for pos in absolute_positions]
+  hundreds_below = [(pos-1) // 100 for pos in absolute_positions]
+  total_zeros = sum(
+    hundred - prev_hundred if step >= 0 else prev_below - below
+    for step, prev_hundred, hundred, prev_below, below in zip(
+      steps, hundreds, hundreds[1:], hundreds_below, hundreds_below[1:]
+    )
+  )
+  landed_zeros = sum(1 for pos in absolute_positions[1:] if pos % 100 == 0)
+  return absolute_positions[-1] % 100, landed_zeros, total_zeros
+
+
+def count_zero_passes_over_chunks(
+    step_chunks: Iterable[Sequence[int]],
+    start_position: int = 50,
+) -> tuple[int, int, int]:
+  position = start_position
+  landed_zeros = total_zeros = 0
+  for chunk in step_chunks:
+    position, chunk_landed, chunk_total = count_zero_passes(chunk, position)
+    landed_zeros += chunk_landed
+    total_zeros += chunk_total
+  return position, landed_zeros, total_zeros
+
+
+def count_zero_passes_chunked(
+    steps: Iterable[int],
+    start_position: int = 50,
+    chunk_size: int = 1 << 16,
+) -> tuple[int, int, int]:
+  # count_zero_passes over chunk_size steps at a time, for step streams too
+  # large to hold at once
+  steps = iter(steps)
+  step_chunks = iter(lambda: array('q', itertools.islice(steps, chunk_size)), array('q'))
+  return count_zero_passes_over_chunks(step_chunks, start_position)
+
+
+def main(file_name: str = _DATA_FILE_NAME) -> common.AdventOfCodeManager:
   aoc_manager = common.AdventOfCodeManager()
-  data = common.read_and_parse_file(_DATA_FILE_NAME, line_parse_fn)
   part_1_sol = part_2_sol = 0
 
-  for pos, hidden_zeros in dial_position_generator(data):
-    part_1_sol += pos==0
-    part_2_sol += hidden_zeros
+  _, part_1_sol, part_2_sol = count_zero_passes_over_chunks(
+    iter_instruction_step_chunks(file_name)
+  )
   aoc_manager.submit_part_1(part_1_sol, expectation=984)
-  part_2_sol += part_1_sol
   aoc_manager.submit_part_2(part_2_sol, expectation=5657)
 
-  aoc_manager.show()
+  return aoc_manager
+
+
+if __name__ == "__main__":
+  # The batched engines agree with dial_position_generator on seeded turns that
+  # start with L50 then L0. The zero-length turn from 0 lands on 0 again, and
+  # rotate_dial's -1 hidden zeros cancels it, so neither engine counts a pass.
+  rng = random.Random(0)
+  test_instructions = [(Direction.LEFT, 50), (Direction.LEFT, 0)] + [
+    (rng.choice(list(Direction)), rng.choice((0, 100, rng.randrange(400))))
+    for _ in range(300)
+  ]
+  test_positions = list(dial_position_generator(test_instructions))
+  assert test_positions[:2] == [(0, 0), (0, -1)]
+  landed_zeros = sum(position == 0 for position, _ in test_positions)
+  hidden_zeros = sum(hidden for _, hidden in test_positions)
+  expected_passes = (test_positions[-1][0], landed_zeros, landed_zeros + hidden_zeros)
+  test_steps = encode_instructions(test_instructions)
+  assert count_zero_passes(test_steps[:2]) == (0, 2, 1)
+  assert count_zero_passes(test_steps) == expected_passes
+  for chunk_size in (1, 7):
+    assert count_zero_passes_chunked(test_steps, chunk_size=chunk_size) == expected_passes
+
+  main().show()
@@ -1,5 +1,8 @@
 
 from typing import Final, Callable
+import itertools
+import math
+import random
 
 import common
 
@@ -46,14 +49,95 @@ def count_matching_numbers_in_range(
   return count
 
 
-if __name__ == "__main__":
+def sum_pattern_numbers_in_range(
+    start: int,
+    end: int,
+    num_digits: int,
+    pattern_length: int,
+) -> int:
+  # A pattern p repeated to num_digits digits is p*(10^n-1)/(10^k-1), so the
+  # matches in range are an arithmetic series over the allowed patterns.
+  multiplier = (10**num_digits - 1) // (10**pattern_length - 1)
+  lowest_pattern = max(10**(pattern_length-1), -(-start // multiplier))
+  highest_pattern = min(10**pattern_length - 1, end // multiplier)
+  if lowest_pattern > highest_pattern:
+    return 0
+  pattern_sum = (lowest_pattern + highest_pattern) * (highest_pattern - lowest_pattern + 1) // 2
+  return multiplier * pattern_sum
+
+
+def get_prime_factors(num: int) -> list[int]:
+  factors = []
+  factor = 2
+  while factor*factor <= num:
+    if num % factor == 0:
+      factors.append(factor)
+      while num % factor == 0:
+        num //= factor
+    factor += 1
+  if num > 1:
+    factors.append(num)
+  return factors
+
+
+def get_digit_counts(start: int, end: int) -> range:
+  return range(len(str(start)), len(str(end))+1)
+
+
+def sum_doubled_numbers_in_range(
+    start: int,
+    end: int,
+) -> int:
+  return sum(
+    sum_pattern_numbers_in_range(start, end, num_digits, num_digits//2)
+    for num_digits in get_digit_counts(start, end)
+    if num_digits%2 == 0
+  )
+
+
+def sum_repeating_pattern_numbers_in_range(
+    start: int,
+    end: int,
+) -> int:
+  # Numbers with periods a and b also have period gcd(a, b), so inclusion-exclusion
+  # over the maximal periods num_digits/prime counts every match exactly once.
+  total = 0
+  for num_digits in get_digit_counts(start, end):
+    primes = get_prime_factors(num_digits)
+    for subset_size in range(1, len(primes)+1):
+      sign = 1 if subset_size%2 == 1 else -1
+      for subset in itertools.combinations(primes, subset_size):
+        pattern_length = num_digits // math.prod(subset)
+        total += sign * sum_pattern_numbers_in_range(start, end, num_digits, pattern_length)
+  return total
+
+
+def main(file_name: str = _DATA_FILE_NAME) -> common.AdventOfCodeManager:
   aoc_manager = common.AdventOfCodeManager()
-  data = common.read_and_parse_file(_DATA_FILE_NAME, line_parse_fn)
+  data = common.read_and_parse_file(file_name, line_parse_fn)
   part_1_sol = part_2_sol = 0
 
-  part_1_sol = sum(count_matching_numbers_in_range(*ran, is_number_doubled) for ran in data)
+  part_1_sol = sum(sum_doubled_numbers_in_range(*ran) for ran in data)
   aoc_manager.submit_part_1(part_1_sol, expectation=23534117921)
-  part_2_sol = sum(count_matching_numbers_in_range(*ran, is_number_repeating_pattern) for ran in data)
+  part_2_sol = sum(sum_repeating_pattern_numbers_in_range(*ran) for ran in data)
   aoc_manager.submit_part_2(part_2_sol, expectation=31755323497)
 
-  aoc_manager.show()
+  return aoc_manager
+
+
+if __name__ == "__main__":
+  # The closed forms agree with the brute-force matchers on seeded ranges,
+  # including ranges that cross a digit count boundary
+  rng = random.Random(0)
+  test_ranges = [(1, 10**4), (95, 115), (998, 1012), (999999, 1000001)]
+  for _ in range(300):
+    start = rng.randint(1, 10**rng.randint(1, 10))
+    test_ranges.append((start, start + rng.randint(0, 2000)))
+  for start, end in test_ranges:
+    for closed_form, match_function in (
+        (sum_doubled_numbers_in_range, is_number_doubled),
+        (sum_repeating_pattern_numbers_in_range, is_number_repeating_pattern),
+    ):
+      assert closed_form(start, end) == count_matching_numbers_in_range(start, end, match_function)
+
+  main().show()
@@ -1,5 +1,5 @@
 
-from typing import Final
+from typing import Final, Sequence
 
 import common
 
@@ -25,21 +25,58 @@ def get_largest_combination(line: list[int], num_digits: int) -> int:
   return largest_pairing
 
 
+def get_largest_subsequence(line: Sequence[int], num_digits: int) -> int:
+  # Greedy monotonic stack, dropping a smaller digit whenever a larger one
+  # arrives and enough digits remain to still fill num_digits. O(n) for any k.
+  if num_digits > len(line):
+    raise ValueError(f"Can't pick {num_digits} digits from a line of {len(line)}")
+  droppable = len(line) - num_digits
+  stack = []
+  for digit in line:
+    while droppable and stack and stack[-1] < digit:
+      stack.pop()
+      droppable -= 1
+    stack.append(digit)
+
+  largest = 0
+  for digit in stack[:num_digits]:
+    largest = largest*10 + digit
+  return largest
+
+
+def get_largest_subsequence_sums(
+    raw_data: bytes,
+    digit_counts: Sequence[int],
+) -> list[int]:
+  # Every bank of the raw file in one pass, one sum per entry of digit_counts.
+  # Iterating bytes gives ASCII codes, so the digits are the codes minus '0'.
+  sums = [0]*len(digit_counts)
+  zero = ord('0')
+  for bank in raw_data.split():
+    digits = [code - zero for code in bank]
+    for idx, num_digits in enumerate(digit_counts):
+      sums[idx] += get_largest_subsequence(digits, num_digits)
+  return sums
+
+
 def get_largest_pairing(line: list[int]) -> int:
-  return get_largest_combination(line, 2)
+  return get_largest_subsequence(line, 2)
 
 
-if __name__ == "__main__":
+def main(file_name: str = _DATA_FILE_NAME) -> common.AdventOfCodeManager:
   aoc_manager = common.AdventOfCodeManager()
-  data = common.read_and_parse_file(_DATA_FILE_NAME, line_parse_fn)
+  raw_data = common.read_raw_bytes(file_name)
   part_1_sol = part_2_sol = 0
 
-  part_1_sol = sum(get_largest_pairing(line) for line in data)
+  part_1_sol, part_2_sol = get_largest_subsequence_sums(raw_data, (2, 12))
   aoc_manager.submit_part_1(part_1_sol, expectation=16993)
-  part_2_sol = sum(get_largest_combination(line, 12) for line in data)
   aoc_manager.submit_part_2(part_2_sol, expectation=168617068915447)
 
-  aoc_manager.show()
+  return aoc_manager
+
+
+if __name__ == "__main__":
+  main().show()
 
 
 """
@@ -1,62 +1,108 @@
 
-from typing import Final, Mapping
+from typing import Final
 
 import common
 
 _DATA_FILE_NAME: Final = 'data/day_04.txt'
 _PAPER_TILE: Final = '@'
 _FLOOR_TILE: Final = '.'
+_PAPER_BYTE: Final = ord(_PAPER_TILE)
+_FLOOR_BYTE: Final = ord(_FLOOR_TILE)
+_ACCESSIBLE_COUNT_TABLE: Final = bytes(int(count < 4) for count in range(256))
 
 
 def is_paper_accessible(
-    factory_map: Mapping[complex, str],
-    query_position: complex
+    factory_map: common.Grid,
+    query_index: int
 ):
-  if factory_map[query_position] != _PAPER_TILE:
+  cells = factory_map.cells
+  if cells[query_index] != _PAPER_BYTE:
     return False
 
   adjacent_paper_count = 0
-  for delta in common.get_complex_directions(include_diagonals=True):
-    adjacent_paper_count += int(factory_map.get(query_position+delta, _FLOOR_TILE) == _PAPER_TILE)
+  for delta in factory_map.neighbor_offsets(include_diagonals=True):
+    adjacent_paper_count += cells[query_index+delta] == _PAPER_BYTE
   return adjacent_paper_count < 4
 
 
+def get_accessible_paper_mask(
+    factory_map: common.Grid,
+) -> bytes:
+  paper_mask = factory_map.mask(_PAPER_TILE)
+  neighbor_counts = factory_map.count_neighbors(_PAPER_TILE, include_diagonals=True)
+  accessible_mask = (
+    int.from_bytes(paper_mask, 'little') &
+    int.from_bytes(neighbor_counts.translate(_ACCESSIBLE_COUNT_TABLE), 'little')
+  )
+  return accessible_mask.to_bytes(len(paper_mask), 'little')
+
+
+def count_accessible_paper(
+    factory_map: common.Grid,
+) -> int:
+  return get_accessible_paper_mask(factory_map).count(1)
+
+
+def peel_accessible_paper(
+    factory_map: common.Grid,
+) -> list[int]:
+  # k-core style peeling: neighbour counts are computed once and decremented as
+  # rolls are removed. Returns the removal round of each cell index, 0 if kept.
+  cells = factory_map.cells
+  neighbor_offsets = factory_map.neighbor_offsets(include_diagonals=True)
+  neighbor_counts = bytearray(
+    factory_map.count_neighbors(_PAPER_TILE, include_diagonals=True)
+  )
+  accessible_mask = get_accessible_paper_mask(factory_map)
+  removal_rounds = [0]*len(cells)
+
+  removal_round = 1
+  frontier = [idx for idx in factory_map.indices() if accessible_mask[idx]]
+  for idx in frontier:
+    removal_rounds[idx] = removal_round
+  while frontier:
+    removal_round += 1
+    next_frontier = []
+    for idx in frontier:
+      for delta in neighbor_offsets:
+        neighbor = idx + delta
+        if cells[neighbor] != _PAPER_BYTE or removal_rounds[neighbor]:
+          continue
+        neighbor_counts[neighbor] -= 1
+        if neighbor_counts[neighbor] < 4:
+          removal_rounds[neighbor] = removal_round
+          next_frontier.append(neighbor)
+    frontier = next_frontier
+  return removal_rounds
+
+
 def remove_accesible_paper(
-    factory_map: Mapping[complex, str],
+    factory_map: common.Grid,
 ):
-  remaining_paper_positions = set((pos for pos in factory_map.keys() if factory_map[pos]==_PAPER_TILE))
-  coords_to_check_next_iter = remaining_paper_positions
-  while True:
-    new_coords_to_remove = [
-      pos for pos in coords_to_check_next_iter
-      if is_paper_accessible(factory_map, pos)
-    ]
-    if not new_coords_to_remove:
-      return factory_map
-
-    coords_to_check_next_iter = set()
-    for pos in new_coords_to_remove:
-      factory_map[pos] = _FLOOR_TILE
-      remaining_paper_positions.remove(pos)
-      for delta in common.get_complex_directions(include_diagonals=True):
-        new_pos = pos+delta
-        if new_pos in remaining_paper_positions:
-          coords_to_check_next_iter.add(new_pos)
+  cells = factory_map.cells
+  for idx, removal_round in enumerate(peel_accessible_paper(factory_map)):
+    if removal_round:
+      cells[idx] = _FLOOR_BYTE
+  return factory_map
 
 
-if __name__ == "__main__":
+def main(file_name: str = _DATA_FILE_NAME) -> common.AdventOfCodeManager:
   aoc_manager = common.AdventOfCodeManager()
 
-  data = common.read_and_parse_grid_to_dict(_DATA_FILE_NAME)
+  data = common.read_and_parse_grid(file_name)
   part_1_sol = part_2_sol = 0
 
-  part_1_sol = sum(is_paper_accessible(data, pos) for pos in data.keys())
+  part_1_sol = count_accessible_paper(data)
   aoc_manager.submit_part_1(part_1_sol, expectation=1602)
 
-  starting_paper_count = sum(char==_PAPER_TILE for char in data.values())
+  starting_paper_count = data.count(_PAPER_TILE)
   data_after_paper_removal = remove_accesible_paper(data)
-  ending_paper_count = sum(char==_PAPER_TILE for char in data_after_paper_removal.values())
+  ending_paper_count = data_after_paper_removal.count(_PAPER_TILE)
   part_2_sol = starting_paper_count - ending_paper_count
   aoc_manager.submit_part_2(part_2_sol, expectation=9518)
 
-  aoc_manager.show()
+  return aoc_manager
+
+
+if __name__ == "__main__":
+  main().show()
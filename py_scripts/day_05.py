@@ -1,5 +1,7 @@
 
-from typing import Final, Sequence, NewType
+from typing import Final, Sequence, NewType, Iterable
+
+import contextlib
 
 import common
 
@@ -12,13 +14,10 @@ Range = NewType("Range", tuple[int, int])
 def read_and_parse_file(
     file_name: str
 ) -> tuple[list[Range], list[int]]:
-  raw_lines = common.read_raw_file(file_name)
-  ranges, ingredients = raw_lines.split('\n\n')
-  ranges = [line for line in ranges.split('\n') if line]
-  ingredients = [line for line in ingredients.split('\n') if line]
-
-  ranges = [tuple(map(int, line.split('-'))) for line in ranges]
-  ingredients = [int(x) for x in ingredients]
+  # Sections stream in order, so each is consumed before asking for the next
+  with contextlib.closing(common.iter_int_sections(file_name, separator=b'-')) as sections:
+    ranges = list(next(sections))
+    ingredients = [num for num, in next(sections)]
   return ranges, ingredients
 
 
@@ -53,28 +52,9 @@ def merge_ranges(
 
 
 def iteratively_merge_all_ranges(
-    ranges: Sequence[Range],
+    ranges: Iterable[Range],
 ) -> list[Range]:
-  ranges = sorted(ranges, key=lambda x: x[0])
-
-  while True:
-    new_ranges = []
-    idx = 0
-    while idx < len(ranges)-1:
-      range_a, range_b = ranges[idx], ranges[idx+1]
-      if can_ranges_be_merged(range_a, range_b):
-        new_ranges.append(merge_ranges(range_a, range_b))
-        idx += 2
-        if idx == len(ranges) - 1:
-          new_ranges.append(ranges[-1])
-      else:
-        new_ranges.append(range_a)
-        idx += 1
-        if idx == len(ranges) - 1:
-          new_ranges.append(ranges[-1])
-    if len(new_ranges) == len(ranges):
-      return new_ranges
-    ranges = new_ranges
+  return common.merge_intervals(ranges)
 
 
 def count_all_in_range(
@@ -86,18 +66,21 @@ def count_all_in_range(
   return sum(b-a+1 for a, b in ranges)
 
 
-if __name__ == "__main__":
+def main(file_name: str = _DATA_FILE_NAME) -> common.AdventOfCodeManager:
   aoc_manager = common.AdventOfCodeManager()
 
-  ranges, ingredients = read_and_parse_file(_DATA_FILE_NAME)
-  ranges = sorted(ranges, key=lambda x: x[0])
-  merged_ranges = iteratively_merge_all_ranges(ranges)
   part_1_sol = part_2_sol = 0
-
-  part_1_sol = sum(is_number_in_any_range(num, merged_ranges) for num in ingredients)
+  with contextlib.closing(common.iter_int_sections(file_name, separator=b'-')) as sections:
+    merged_ranges = iteratively_merge_all_ranges(next(sections))
+    range_index = common.IntervalIndex(merged_ranges)
+    part_1_sol = sum(range_index.contains(num) for num, in next(sections))
   aoc_manager.submit_part_1(part_1_sol, expectation=896)
 
-  part_2_sol = count_all_in_range(merged_ranges)
+  part_2_sol = range_index.count_covered()
   aoc_manager.submit_part_2(part_2_sol, expectation=346240317247002)
 
-  aoc_manager.show()
+  return aoc_manager
+
+
+if __name__ == "__main__":
+  main().show()
@@ -1,101 +1,24 @@
 
 from typing import Final, Sequence, Iterator
+import math
+import os
+import tempfile
 
 import common
 
 _DATA_FILE_NAME: Final = 'data/day_06.txt'
+_NON_SPACE_TABLE: Final = bytes(int(code != ord(' ')) for code in range(256))
+_DIGIT_TABLE: Final = bytes(
+  code - ord('0') if ord('0') <= code <= ord('9') else 255 for code in range(256)
+)
 
 
-def parse_if_numbers(line: str) -> list[str] | list[int]:
-  split_line = line.strip().split()
-  return split_line if '+' in split_line else list(map(int, split_line))
-
-
-def pad_string(
-    string: str,
-    pad_to: int,
-    fill_char: str = ' '
-):
-  if len(fill_char) != 1:
-    raise ValueError(f"Expected fill_char to be one character, got {fill_char}")
-  if pad_to < 1:
-    raise ValueError(f"Expected pad_to to be positive, got {pad_to}")
-  if len(string) >= pad_to:
-    return string
-  return ''.join([string, fill_char*(pad_to - len(string))])
-
-
-def get_separator_columns(numbers: list[str]) -> list[int]:
-  num_total_rows = len(numbers)
-  num_total_columns = len(numbers[0])
-
-  separator_columns = set(range(num_total_columns))
-  for col in range(num_total_columns):
-    for row in range(num_total_rows):
-      if numbers[row][col] != ' ':
-        separator_columns.remove(col)
-        break
-  return list(separator_columns)
-
-
-def split_lines_by_columns(
-    lines: list[str],
-    split_columns: Sequence[int]
-) -> list[str]:
-  split_columns = sorted(list(split_columns))
-  split_columns = [-1] + split_columns + [len(lines[0])]
-  new_lines = []
-  for line in lines:
-    new_line = []
-    for i0, i1 in zip(split_columns[:-1], split_columns[1:], strict=True):
-      new_line.append(line[i0+1:i1])
-    new_lines.append(new_line)
-  return new_lines
-
-
-def pad_number_matrix(numbers: list[str]) -> list[str]:
-  num_total_rows = len(numbers)
-  num_total_columns = len(numbers[0])
-
-  separator_columns = set(range(num_total_columns))
-  for col in range(num_total_columns):
-    for row in range(num_total_rows):
-      if numbers[row][col] != ' ':
-        separator_columns.remove(col)
-        break
-
-  for row in range(num_total_rows):
-    new_row = []
-    for col in range(num_total_columns):
-      if col in separator_columns:
-        new_row.append(' ')
-      elif numbers[row][col] == ' ':
-        new_row.append('0')
-      else:
-        new_row.append(numbers[row][col])
-    numbers[row] = ''.join(new_row)
-
-  return numbers
-
 def long_sum(elements: Sequence[int]) -> int:
   return sum(elements)
 
 
 def long_product(elements: Sequence[int]) -> int:
-  mult = 1
-  for element in elements:
-    mult *= element
-  return mult
-
-
-def extract_column_numbers(elements: Sequence[str]) -> list[int]:
-  num_cols = len(elements[0])
-  num_rows = len(elements)
-  column_nums = []
-  for col in range(num_cols):
-    num = int(''.join((elements[row][col] for row in range(num_rows))))
-    column_nums.append(num)
-  return column_nums
+  return math.prod(elements)
 
 
 _SYMBOL_TO_FUNCTION: Final = {
@@ -104,26 +27,150 @@ _SYMBOL_TO_FUNCTION: Final = {
 }
 
 
-if __name__ == "__main__":
+def load_worksheet_matrix(raw_data: bytes) -> tuple[list[bytes], bytes]:
+  lines = [line.rstrip(b'\r') for line in raw_data.rstrip(b'\n').split(b'\n')]
+  width = max(len(line) for line in lines)
+  number_rows = [line.ljust(width) for line in lines[:-1]]
+  return number_rows, lines[-1].ljust(width)
+
+
+def get_used_column_mask(number_rows: Sequence[bytes]) -> bytes:
+  # Each row becomes a 0/1 non-space mask packed into one big int, so OR-ing
+  # them finds the all-space separator columns (zero bytes) in a single reduction
+  used_columns = 0
+  for row in number_rows:
+    used_columns |= int.from_bytes(row.translate(_NON_SPACE_TABLE), 'big')
+  return used_columns.to_bytes(len(number_rows[0]), 'big')
+
+
+def get_worksheet_blocks(number_rows: Sequence[bytes]) -> list[tuple[int, int]]:
+  width = len(number_rows[0])
+  used_mask = get_used_column_mask(number_rows)
+
+  blocks = []
+  start = 0
+  while start < width:
+    end = used_mask.find(0, start)
+    if end == -1:
+      end = width
+    if end > start:
+      blocks.append((start, end))
+    start = end+1
+  return blocks
+
+
+def get_column_numbers(number_rows: Sequence[bytes]) -> list[int]:
+  # Digit weighting down every column at once, one row at a time
+  column_numbers = [0]*len(number_rows[0])
+  for row in number_rows:
+    column_numbers = [
+      number*10 + digit if digit < 10 else number
+      for number, digit in zip(column_numbers, row.translate(_DIGIT_TABLE))
+    ]
+  return column_numbers
+
+
+def solve_worksheet(raw_data: bytes) -> tuple[int, int]:
+  number_rows, operator_row = load_worksheet_matrix(raw_data)
+  column_numbers = get_column_numbers(number_rows)
+  row_wise_total = column_wise_total = 0
+  for start, end in get_worksheet_blocks(number_rows):
+    operation = _SYMBOL_TO_FUNCTION[operator_row[start:end].strip().decode()]
+    row_wise_total += operation([int(row[start:end]) for row in number_rows])
+    column_wise_total += operation(column_numbers[start:end])
+  return row_wise_total, column_wise_total
+
+
+def _finish_worksheet_block(
+    block_rows: Sequence[bytearray],
+) -> tuple[list[int], list[int], str]:
+  number_rows = block_rows[:-1]
+  return (
+    [int(row) for row in number_rows],
+    get_column_numbers(number_rows),
+    bytes(block_rows[-1]).strip().decode(),
+  )
+
+
+def iter_worksheet_blocks(
+    file_name: str,
+    chunk_size: int = 1 << 12,
+) -> Iterator[tuple[list[int], list[int], str]]:
+  # Reads all rows side by side one column chunk at a time and yields the row
+  # numbers, column numbers and operator of each block once its separator is
+  # reached, so memory is bounded by block width rather than worksheet width
+  with common.MappedFile(file_name) as mapped_file:
+    num_lines = len(mapped_file)
+    while num_lines and not mapped_file.line_view(num_lines-1).nbytes:
+      num_lines -= 1
+    offsets = mapped_file.line_offsets
+    line_bounds = []
+    for line_idx in range(num_lines):
+      start, end = offsets[line_idx], offsets[line_idx+1]-1
+      if end > start and mapped_file.view[end-1] == ord('\r'):
+        end -= 1
+      line_bounds.append((start, end))
+    width = max((end-start for start, end in line_bounds), default=0)
+
+    block_rows = [bytearray() for _ in line_bounds]
+    for chunk_start in range(0, width, chunk_size):
+      chunk_width = min(chunk_size, width-chunk_start)
+      chunk_rows = [
+        bytes(mapped_file.view[
+          min(start+chunk_start, end):min(start+chunk_start+chunk_width, end)
+        ]).ljust(chunk_width)
+        for start, end in line_bounds
+      ]
+      used_mask = get_used_column_mask(chunk_rows[:-1])
+
+      col = 0
+      while col < chunk_width:
+        separator = used_mask.find(0, col)
+        if separator == -1:
+          separator = chunk_width
+        for block_row, chunk_row in zip(block_rows, chunk_rows):
+          block_row += chunk_row[col:separator]
+        if separator < chunk_width and block_rows[0]:
+          yield _finish_worksheet_block(block_rows)
+          block_rows = [bytearray() for _ in line_bounds]
+        col = separator+1
+
+    if block_rows and block_rows[0]:
+      yield _finish_worksheet_block(block_rows)
+
+
+def solve_worksheet_stream(
+    file_name: str,
+    chunk_size: int = 1 << 12,
+) -> tuple[int, int]:
+  row_wise_total = column_wise_total = 0
+  for row_numbers, column_numbers, symbol in iter_worksheet_blocks(file_name, chunk_size):
+    operation = _SYMBOL_TO_FUNCTION[symbol]
+    row_wise_total += operation(row_numbers)
+    column_wise_total += operation(column_numbers)
+  return row_wise_total, column_wise_total
+
+
+def main(file_name: str = _DATA_FILE_NAME) -> common.AdventOfCodeManager:
   aoc_manager = common.AdventOfCodeManager()
-  part_1_data = common.read_and_parse_file(_DATA_FILE_NAME, parse_if_numbers)
   part_1_sol = part_2_sol = 0
 
-  numbers = part_1_data[:-1]
-  operations = part_1_data[-1]
-  for col, op in enumerate(operations):
-    number_column = [numbers[i][col] for i in range(len(numbers))]
-    part_1_sol += _SYMBOL_TO_FUNCTION[op](number_column)
+  part_1_sol, part_2_sol = solve_worksheet_stream(file_name)
   aoc_manager.submit_part_1(part_1_sol, expectation=6100348226985)
-
-  number_matrix = common.read_raw_file(_DATA_FILE_NAME).strip().split('\n')[:-1]
-  max_length = max(len(line) for line in number_matrix)
-  number_matrix = [pad_string(line, max_length) for line in number_matrix]
-  separator_columns = get_separator_columns(number_matrix)
-  number_matrix = split_lines_by_columns(number_matrix, separator_columns)
-  for col, op in enumerate(operations):
-    number_column = [number_matrix[i][col] for i in range(len(number_matrix))]
-    part_2_sol += _SYMBOL_TO_FUNCTION[op](extract_column_numbers(number_column))
   aoc_manager.submit_part_2(part_2_sol, expectation=12377473011151)
 
-  aoc_manager.show()
+  return aoc_manager
+
+
+if __name__ == "__main__":
+  # Both engines solve the worked example, streamed in chunks of any width
+  example = b'123 328  51 64 \n 45 64  387 23 \n  6 98  215 314\n*   +   *   +  \n'
+  assert solve_worksheet(example) == (4277556, 3263827)
+  with tempfile.TemporaryDirectory() as temp_dir:
+    example_file = os.path.join(temp_dir, 'example.txt')
+    with open(example_file, 'wb') as open_file:
+      open_file.write(example)
+    for chunk_size in (1, 3, 4096):
+      assert solve_worksheet_stream(example_file, chunk_size) == (4277556, 3263827)
+
+  main().show()
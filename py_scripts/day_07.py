@@ -1,5 +1,9 @@
 
 from typing import Final
+from array import array
+import bisect
+import enum
+import random
 
 import common
 
@@ -7,92 +11,380 @@ _DATA_FILE_NAME: Final = 'data/day_07.txt'
 _START_TILE: Final = 'S'
 _SPACE_TILE: Final = '.'
 _SPLITTER_TILE: Final = '^'
+_SPACE_BYTE: Final = ord(_SPACE_TILE)
+_SPLITTER_BYTE: Final = ord(_SPLITTER_TILE)
+
+
+class BeamBackend(enum.Enum):
+  QUEUE = 'queue'
+  ROW_SWEEP = 'row_sweep'
 
 
 class TachyonBeam:
   def __init__(
       self,
-      tile_map: dict[complex, str],
+      tile_map: common.Grid,
+      backend: BeamBackend = BeamBackend.ROW_SWEEP,
   ):
     self._tile_map = tile_map
     self._find_starting_tile()
-    self._grid_extent = common.get_grid_extent(self._tile_map)
 
     self._total_timeline_counts = 0
-    self._splitters_hit = set()
+    self._split_count = 0
 
-    self._evolve_beam()
+    if backend == BeamBackend.QUEUE:
+      self._evolve_beam()
+    elif backend == BeamBackend.ROW_SWEEP:
+      self._evolve_beam_row_sweep()
+    else:
+      raise ValueError(f"Unknown backend {backend}. Expected one of {list(BeamBackend)}")
 
   def _find_starting_tile(self):
-    self._start_pos = None
-    for key, value in data.items():
-      if value == _START_TILE:
-        self._start_pos = key
-        break
-    if self._start_pos is None:
-      raise ValueError("Could not find start tile")
+    self._start_index = self._tile_map.find(_START_TILE)
 
   def _evolve_beam_one_step(
       self,
-      position: complex
-  ) -> list[complex]:
-    one_down = position + common.COMPLEX_DOWN
-    if one_down not in self._tile_map:
+      index: int
+  ) -> list[int]:
+    cells = self._tile_map.cells
+    one_down = index + self._tile_map.stride
+    tile_at_one_down = cells[one_down]
+    if tile_at_one_down == self._tile_map.border_byte:
       return []
-    tile_at_one_down = self._tile_map[one_down]
-    if tile_at_one_down == _SPACE_TILE:
+    if tile_at_one_down == _SPACE_BYTE:
       return [one_down]
-    if tile_at_one_down == _SPLITTER_TILE:
+    if tile_at_one_down == _SPLITTER_BYTE:
       self._splitters_hit.add(one_down)
-      new_positions = [
-        one_down+common.COMPLEX_LEFT,
-        one_down+common.COMPLEX_RIGHT
-      ]
-      new_positions = [pos for pos in new_positions if pos in self._tile_map]
-      return new_positions
-    raise ValueError(f"Unexpected tile found {tile_at_one_down} at position {one_down}")
+      new_indices = [one_down-1, one_down+1]
+      new_indices = [idx for idx in new_indices if cells[idx] != self._tile_map.border_byte]
+      return new_indices
+    raise ValueError(
+      f"Unexpected tile found {chr(tile_at_one_down)} at position "
+      f"{self._tile_map.position_of(one_down)}"
+    )
 
   def _evolve_beam(self):
-    open_positions = common.SortedLookupList(
-      [self._start_pos],
-      sort_key=lambda x: int(x.imag)
-    )
-    timeline_lookup = {self._start_pos: 1}
+    # Keyed on row, so positions are processed row by row and beams landing on
+    # the same position merge their timeline counts
+    open_indices = common.BucketQueue()
+    start_row = self._tile_map.row_col(self._start_index)[0]
+    open_indices.push(self._start_index, start_row, 1)
+    bottom_row = self._tile_map.height - 1
+    self._splitters_hit = set()
 
-    while open_positions._list:
-      current_position = open_positions.pop()
-      current_timelines = timeline_lookup[current_position]
+    while open_indices:
+      current_index, current_row, current_timelines = open_indices.pop()
 
-      if int(current_position.imag) ==  self._grid_extent[2]:
+      if current_row == bottom_row:
         self._total_timeline_counts += current_timelines
         continue
 
-      new_positions = self._evolve_beam_one_step(current_position)
+      for new_idx in self._evolve_beam_one_step(current_index):
+        open_indices.push(new_idx, current_row+1, current_timelines)
 
-      for new_pos in new_positions:
-        if new_pos in open_positions:
-          timeline_lookup[new_pos] += current_timelines
-        else:
-          timeline_lookup[new_pos] = current_timelines
-          open_positions.add(new_pos)
+    self._split_count = len(self._splitters_hit)
+
+  def _evolve_beam_row_sweep(self):
+    # The beam only moves down, so one row of timeline counts per column is
+    # enough, and each splitter can be hit at most once as its row is swept
+    grid = self._tile_map
+    cells = grid.cells
+    border_byte = grid.border_byte
+    start_row, start_col = grid.row_col(self._start_index)
+    timelines = [0]*grid.width
+    timelines[start_col] = 1
+
+    for row in range(start_row+1, grid.height):
+      row_start = grid.index(row, 0)
+      new_timelines = [0]*grid.width
+      for col, count in enumerate(timelines):
+        if not count:
+          continue
+        tile = cells[row_start+col]
+        if tile == _SPACE_BYTE:
+          new_timelines[col] += count
+        elif tile == _SPLITTER_BYTE:
+          self._split_count += 1
+          if cells[row_start+col-1] != border_byte:
+            new_timelines[col-1] += count
+          if cells[row_start+col+1] != border_byte:
+            new_timelines[col+1] += count
+        elif tile != border_byte:
+          raise ValueError(
+            f"Unexpected tile found {chr(tile)} at position "
+            f"{grid.position_of(row_start+col)}"
+          )
+      timelines = new_timelines
+
+    self._total_timeline_counts = sum(timelines)
 
   def get_split_count(self):
-    return len(self._splitters_hit)
+    return self._split_count
 
   def get_timeline_count(self):
     return self._total_timeline_counts
 
 
-if __name__ == "__main__":
+class TachyonManifold:
+  # Parses a manifold once, then answers beam queries from any start. A jump
+  # table gives the first non-space cell below every cell and timelines are
+  # tabulated per splitter from the bottom up, so preprocessing is O(grid) and
+  # timeline queries are O(1). The first split query also tabulates, per
+  # splitter, the bit mask of splitters it reaches, in O(splitters^2 / 64)
+  # time and O(splitters^2 / 8) bytes, after which split queries are a popcount.
+  def __init__(
+      self,
+      tile_map: common.Grid,
+  ):
+    self._tile_map = tile_map
+    self._build_jump_table()
+    self._build_splitter_tables()
+    self._splitter_reach: list[int] | None = None
+
+  def _build_jump_table(self):
+    cells = self._tile_map.cells
+    stride = self._tile_map.stride
+    next_stop = array('q', [-1])*len(cells)
+    for idx in range(len(cells)-stride-1, -1, -1):
+      below = idx + stride
+      next_stop[idx] = below if cells[below] != _SPACE_BYTE else next_stop[below]
+    self._next_stop = next_stop
+
+  def _build_splitter_tables(self):
+    cells = self._tile_map.cells
+    self._splitter_indices = [
+      idx for idx in self._tile_map.indices() if cells[idx] == _SPLITTER_BYTE
+    ]
+    self._splitter_ordinals = array('q', [-1])*len(cells)
+    for ordinal, idx in enumerate(self._splitter_indices):
+      self._splitter_ordinals[idx] = ordinal
+
+    self._splitter_timelines = [0]*len(self._splitter_indices)
+    for ordinal in range(len(self._splitter_indices)-1, -1, -1):
+      self._splitter_timelines[ordinal] = sum(
+        self._follow_beam(side_idx)
+        for side_idx in self._get_side_indices(self._splitter_indices[ordinal])
+      )
+
+  def _build_splitter_reach(self):
+    # Successors sit on later rows, so one bottom-up pass ORs each splitter's
+    # bit into the masks of the splitters its side beams hit
+    reach = [0]*len(self._splitter_indices)
+    for ordinal in range(len(self._splitter_indices)-1, -1, -1):
+      mask = 1 << ordinal
+      for side_idx in self._get_side_indices(self._splitter_indices[ordinal]):
+        stop = self._next_stop[side_idx]
+        if self._get_stop_tile(stop) == _SPLITTER_BYTE:
+          mask |= reach[self._splitter_ordinals[stop]]
+      reach[ordinal] = mask
+    self._splitter_reach = reach
+
+  def _get_side_indices(self, splitter_idx: int) -> list[int]:
+    cells = self._tile_map.cells
+    return [
+      side_idx for side_idx in (splitter_idx-1, splitter_idx+1)
+      if cells[side_idx] != self._tile_map.border_byte
+    ]
+
+  def _get_stop_tile(self, stop: int) -> int:
+    tile = self._tile_map.cells[stop]
+    if tile != _SPLITTER_BYTE and tile != self._tile_map.border_byte:
+      raise ValueError(
+        f"Unexpected tile found {chr(tile)} at position {self._tile_map.position_of(stop)}"
+      )
+    return tile
+
+  def _follow_beam(self, index: int) -> int:
+    # Timelines of a beam heading down from index
+    stop = self._next_stop[index]
+    if self._get_stop_tile(stop) == _SPLITTER_BYTE:
+      return self._splitter_timelines[self._splitter_ordinals[stop]]
+    # Leaving through the bottom is a timeline, falling into a gap is not
+    return int(self._tile_map.row_col(stop)[0] == self._tile_map.height)
+
+  def get_start_indices(self) -> list[int]:
+    cells = self._tile_map.cells
+    start_byte = ord(_START_TILE)
+    return [idx for idx in self._tile_map.indices() if cells[idx] == start_byte]
+
+  def get_timeline_count(self, row: int, col: int) -> int:
+    return self._follow_beam(self._tile_map.index(row, col))
+
+  def get_split_count(self, row: int, col: int) -> int:
+    if self._splitter_reach is None:
+      self._build_splitter_reach()
+    stop = self._next_stop[self._tile_map.index(row, col)]
+    if self._get_stop_tile(stop) != _SPLITTER_BYTE:
+      return 0
+    return self._splitter_reach[self._splitter_ordinals[stop]].bit_count()
+
+  def get_timeline_counts_from_row(self, row: int) -> list[int]:
+    return [self.get_timeline_count(row, col) for col in range(self._tile_map.width)]
+
+  def get_split_counts_from_row(self, row: int) -> list[int]:
+    return [self.get_split_count(row, col) for col in range(self._tile_map.width)]
+
+
+class SplitterDag:
+  # Sparse alternative to TachyonManifold for tall, sparse manifolds. Each
+  # column keeps only the sorted rows where a beam would stop (splitters and
+  # gaps), successors of a splitter are found by bisecting those lazily, and
+  # counts are memoised per splitter, so queries scale with the splitters
+  # reached rather than the grid area.
+  _EXIT: Final = -1
+  _LOST: Final = -2
+
+  def __init__(
+      self,
+      tile_map: common.Grid,
+  ):
+    self._tile_map = tile_map
+    self._stop_rows: list[list[int]] = [[] for _ in range(tile_map.width)]
+    self._stop_is_splitter: list[bytearray] = [bytearray() for _ in range(tile_map.width)]
+    self._compile_column_stops()
+    self._successors: dict[int, tuple[int, int]] = {}
+    self._timelines: dict[int, int] = {}
+
+  def _compile_column_stops(self):
+    cells = self._tile_map.cells
+    splitter = _SPLITTER_TILE.encode()
+    border = self._tile_map.border.encode()
+    known_tiles = (_SPACE_TILE + _SPLITTER_TILE + _START_TILE).encode() + border
+    for row in range(self._tile_map.height):
+      row_slice = self._tile_map.row_slice(row)
+      unexpected = cells[row_slice].translate(None, known_tiles)
+      if unexpected:
+        idx = cells.find(unexpected[:1], row_slice.start, row_slice.stop)
+        raise ValueError(
+          f"Unexpected tile found {chr(unexpected[0])} at position {self._tile_map.position_of(idx)}"
+        )
+      for tile, is_splitter in ((splitter, 1), (border, 0)):
+        idx = cells.find(tile, row_slice.start, row_slice.stop)
+        while idx != -1:
+          col = idx - row_slice.start
+          self._stop_rows[col].append(row)
+          self._stop_is_splitter[col].append(is_splitter)
+          idx = cells.find(tile, idx+1, row_slice.stop)
+
+  def _next_stop(self, row: int, col: int) -> int:
+    # Index of the first splitter strictly below, or _EXIT / _LOST
+    stop_rows = self._stop_rows[col]
+    stop_pos = bisect.bisect_right(stop_rows, row)
+    if stop_pos == len(stop_rows):
+      return self._EXIT
+    if not self._stop_is_splitter[col][stop_pos]:
+      return self._LOST
+    return self._tile_map.index(stop_rows[stop_pos], col)
+
+  def _get_successors(self, splitter_idx: int) -> tuple[int, int]:
+    successors = self._successors.get(splitter_idx)
+    if successors is None:
+      row, col = self._tile_map.row_col(splitter_idx)
+      successors = tuple(
+        self._LOST if self._tile_map.cells[splitter_idx+delta] == self._tile_map.border_byte
+        else self._next_stop(row, col+delta)
+        for delta in (-1, 1)
+      )
+      self._successors[splitter_idx] = successors
+    return successors
+
+  def _count_node_timelines(self, node: int) -> int:
+    # Iterative post-order DFS, so tall manifolds do not hit the recursion limit
+    if node == self._EXIT:
+      return 1
+    if node == self._LOST:
+      return 0
+    stack = [node]
+    while stack:
+      current = stack[-1]
+      if current in self._timelines:
+        stack.pop()
+        continue
+      pending = [
+        successor for successor in self._get_successors(current)
+        if successor >= 0 and successor not in self._timelines
+      ]
+      if pending:
+        stack.extend(pending)
+        continue
+      self._timelines[current] = sum(
+        1 if successor == self._EXIT else self._timelines.get(successor, 0)
+        for successor in self._get_successors(current)
+      )
+      stack.pop()
+    return self._timelines[node]
+
+  def count_timelines(self, row: int, col: int) -> int:
+    return self._count_node_timelines(self._next_stop(row, col))
+
+  def count_splitters_reached(self, row: int, col: int) -> int:
+    first = self._next_stop(row, col)
+    if first < 0:
+      return 0
+    reached = {first}
+    to_explore = [first]
+    while to_explore:
+      for successor in self._get_successors(to_explore.pop()):
+        if successor >= 0 and successor not in reached:
+          reached.add(successor)
+          to_explore.append(successor)
+    return len(reached)
+
+
+def main(file_name: str = _DATA_FILE_NAME) -> common.AdventOfCodeManager:
   aoc_manager = common.AdventOfCodeManager()
-  data = common.read_and_parse_grid_to_dict(_DATA_FILE_NAME)
+  data = common.read_and_parse_grid(file_name)
   part_1_sol = part_2_sol = 0
 
-  beamline = TachyonBeam(data)
-  part_1_sol = beamline.get_split_count()
+  splitter_dag = SplitterDag(data)
+  start_row, start_col = data.row_col(data.find(_START_TILE))
+  part_1_sol = splitter_dag.count_splitters_reached(start_row, start_col)
   aoc_manager.submit_part_1(part_1_sol, expectation=1642)
 
-  part_2_sol = beamline.get_timeline_count()
+  part_2_sol = splitter_dag.count_timelines(start_row, start_col)
   aoc_manager.submit_part_2(part_2_sol, expectation=47274292756692)
 
-  aoc_manager.show()
+  return aoc_manager
+
+
+if __name__ == "__main__":
+  # The manifold tables agree with the splitter DAG from every column of a
+  # seeded manifold, including short rows whose missing cells are gaps
+  rng = random.Random(0)
+  test_lines = ['.'*10 + 'S' + '.'*10]
+  for row in range(1, 30):
+    line = ''.join('^' if (row+col) % 2 == 0 and rng.random() < 0.4 else '.' for col in range(21))
+    test_lines.append(line[:15] if row % 7 == 0 else line)
+  test_map = common.Grid(test_lines)
+  test_manifold, test_dag = TachyonManifold(test_map), SplitterDag(test_map)
+  for row in (0, 10):
+    for col in range(test_map.width):
+      assert test_manifold.get_timeline_count(row, col) == test_dag.count_timelines(row, col)
+      assert test_manifold.get_split_count(row, col) == test_dag.count_splitters_reached(row, col)
+    assert test_manifold.get_split_counts_from_row(row) == [
+      test_dag.count_splitters_reached(row, col) for col in range(test_map.width)
+    ]
+  test_start = test_map.row_col(test_map.find(_START_TILE))
+  for backend in BeamBackend:
+    test_beam = TachyonBeam(test_map, backend)
+    assert test_beam.get_split_count() == test_dag.count_splitters_reached(*test_start)
+    assert test_beam.get_timeline_count() == test_dag.count_timelines(*test_start)
+
+  # Every engine rejects an unknown tile with the same error
+  bad_map = common.Grid(['..S..', '..x..', '.....'])
+  bad_start = bad_map.row_col(bad_map.find(_START_TILE))
+  bad_engines = [
+    lambda: TachyonManifold(bad_map).get_split_count(*bad_start),
+    lambda: SplitterDag(bad_map).count_splitters_reached(*bad_start),
+  ] + [lambda backend=backend: TachyonBeam(bad_map, backend).get_split_count() for backend in BeamBackend]
+  bad_messages = set()
+  for bad_engine in bad_engines:
+    try:
+      bad_engine()
+    except ValueError as error:
+      bad_messages.add(str(error))
+    else:
+      raise AssertionError("Unknown tile was accepted")
+  assert len(bad_messages) == 1
+
+  main().show()
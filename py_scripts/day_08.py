@@ -1,6 +1,9 @@
 
-from typing import Final, NewType, Sequence
+from typing import Final, NewType, Sequence, Iterator
 from collections import defaultdict
+import heapq
+import math
+import random
 
 import common
 
@@ -26,6 +29,188 @@ def build_distance_pairs(coords: Sequence[Coord]) -> list[tuple[int, int, int]]:
   return pairs_and_distances
 
 
+def get_closest_pairs(
+    coord_columns: Sequence[Sequence[int]],
+    num_pairs: int,
+    tile_size: int = 512,
+) -> list[tuple[int, int, int]]:
+  # Square distances are computed one tile_size x tile_size block at a time and
+  # kept candidates are cut back to the num_pairs smallest whenever they reach
+  # twice that, so peak memory is bounded by num_pairs and the tile size.
+  # Ties are ordered as in a stable sort of build_distance_pairs.
+  xs, ys, zs = coord_columns
+  num_coords = len(xs)
+  closest: list[tuple[int, int, int]] = []
+  threshold = None
+  if num_pairs <= 0:
+    return closest
+  for row_start in range(0, num_coords, tile_size):
+    row_end = min(row_start+tile_size, num_coords)
+    for col_start in range(0, row_end-1, tile_size):
+      col_end = min(col_start+tile_size, row_end-1)
+      tile_xs, tile_ys, tile_zs = xs[col_start:col_end], ys[col_start:col_end], zs[col_start:col_end]
+      tile_candidates = []
+      for i in range(max(row_start, col_start+1), row_end):
+        num_cols = min(col_end, i) - col_start
+        xi, yi, zi = xs[i], ys[i], zs[i]
+        distances = [
+          (xi-x)*(xi-x) + (yi-y)*(yi-y) + (zi-z)*(zi-z)
+          for x, y, z in zip(tile_xs[:num_cols], tile_ys[:num_cols], tile_zs[:num_cols])
+        ]
+        tile_candidates.extend(
+          (distance, i, j)
+          for j, distance in enumerate(distances, start=col_start)
+          if threshold is None or distance <= threshold
+        )
+      closest.extend(tile_candidates)
+      if len(closest) >= 2*num_pairs:
+        closest = heapq.nsmallest(num_pairs, closest)
+        threshold = closest[-1][0]
+  closest = heapq.nsmallest(num_pairs, closest)
+  return [(j, i, distance) for distance, i, j in closest]
+
+
+def get_minimum_spanning_tree(
+    coord_columns: Sequence[Sequence[int]],
+) -> list[tuple[int, int, int]]:
+  # Dense Prim's in O(N^2) time and O(N) memory. Edges are keyed on
+  # (distance, high, low) packed into one int, the same total order the
+  # Kruskal loop sees, so the tree matches it even with tied distances.
+  # Returned in that order, so the last edge is the final connection.
+  xs, ys, zs = coord_columns
+  num_coords = len(xs)
+  if num_coords == 0:
+    return []
+
+  remaining = list(range(1, num_coords))
+  best_keys = [None]*len(remaining)
+  current = 0
+  tree_keys = []
+  while remaining:
+    cx, cy, cz = xs[current], ys[current], zs[current]
+    candidate_keys = [
+      (((cx-xs[idx])**2 + (cy-ys[idx])**2 + (cz-zs[idx])**2) * num_coords + idx) * num_coords + current
+      if idx > current else
+      (((cx-xs[idx])**2 + (cy-ys[idx])**2 + (cz-zs[idx])**2) * num_coords + current) * num_coords + idx
+      for idx in remaining
+    ]
+    best_keys = [
+      candidate if best is None or candidate < best else best
+      for best, candidate in zip(best_keys, candidate_keys)
+    ]
+    nearest = min(range(len(remaining)), key=best_keys.__getitem__)
+    tree_keys.append(best_keys[nearest])
+    current = remaining[nearest]
+    remaining[nearest], best_keys[nearest] = remaining[-1], best_keys[-1]
+    remaining.pop()
+    best_keys.pop()
+
+  tree = []
+  for key in sorted(tree_keys):
+    key, low = divmod(key, num_coords)
+    distance, high = divmod(key, num_coords)
+    tree.append((low, high, distance))
+  return tree
+
+
+class CoordBuckets:
+  # Uniform grid of cubic buckets over the coords, used to yield pairs in order
+  # of increasing distance without building the full pair list.
+  def __init__(
+      self,
+      coords: Sequence[Coord],
+      cell_size: int | None = None,
+  ):
+    self._coords = coords
+    if not coords:
+      self._cell_size = 1
+      self._cells = []
+      self._buckets = {}
+      self._max_radius = 0
+      return
+
+    mins = [min(axis) for axis in zip(*coords)]
+    maxs = [max(axis) for axis in zip(*coords)]
+    if cell_size is None:
+      volume = math.prod(high-low+1 for low, high in zip(mins, maxs))
+      cell_size = max(1, round((volume / len(coords)) ** (1/3)))
+    self._cell_size = cell_size
+    self._mins = mins
+
+    self._cells = [self._get_cell(coord) for coord in coords]
+    self._buckets: dict[tuple[int, int, int], list[int]] = defaultdict(list)
+    for idx, cell in enumerate(self._cells):
+      self._buckets[cell].append(idx)
+    self._max_radius = max((high-low) // cell_size for low, high in zip(mins, maxs))
+
+  def _get_cell(self, coord: Coord) -> tuple[int, int, int]:
+    return tuple((x-low) // self._cell_size for x, low in zip(coord, self._mins))
+
+  def _iter_ring(
+      self,
+      cell: tuple[int, int, int],
+      radius: int
+  ) -> Iterator[int]:
+    # All coords in buckets at exactly Chebyshev distance radius from cell
+    cx, cy, cz = cell
+    for dx in range(-radius, radius+1):
+      for dy in range(-radius, radius+1):
+        if abs(dx) == radius or abs(dy) == radius:
+          dz_values = range(-radius, radius+1)
+        else:
+          dz_values = (-radius, radius)
+        for dz in dz_values:
+          yield from self._buckets.get((cx+dx, cy+dy, cz+dz), ())
+
+  def iter_neighbors(self, index: int) -> Iterator[tuple[int, int]]:
+    # (distance, other) for every other > index, by increasing distance. After
+    # scanning ring r, anything unscanned is further than r*cell_size away.
+    coord = self._coords[index]
+    cell = self._cells[index]
+    candidates = []
+    for radius in range(self._max_radius+1):
+      ring_size = (2*radius+1)**3 - (2*radius-1)**3 if radius else 1
+      if ring_size > len(self._buckets):
+        # Sparse outskirts, cheaper to take every remaining bucket at once
+        remaining = (
+          other
+          for bucket_cell, members in self._buckets.items()
+          if max(abs(a-b) for a, b in zip(bucket_cell, cell)) >= radius
+          for other in members
+        )
+      else:
+        remaining = self._iter_ring(cell, radius)
+      for other in remaining:
+        if other > index:
+          heapq.heappush(candidates, (square_distance(coord, self._coords[other]), other))
+      if ring_size > len(self._buckets):
+        break
+      confirmed_distance = (radius*self._cell_size)**2
+      while candidates and candidates[0][0] <= confirmed_distance:
+        yield heapq.heappop(candidates)
+    while candidates:
+      yield heapq.heappop(candidates)
+
+  def iter_pairs_by_distance(self) -> Iterator[tuple[int, int, int]]:
+    # Merges the per coord streams, ordered as a stable sort of build_distance_pairs
+    neighbor_streams = [self.iter_neighbors(idx) for idx in range(len(self._coords))]
+    heap = []
+    for idx, stream in enumerate(neighbor_streams):
+      nearest = next(stream, None)
+      if nearest is not None:
+        heap.append((nearest[0], nearest[1], idx))
+    heapq.heapify(heap)
+
+    while heap:
+      distance, high, low = heap[0]
+      yield low, high, distance
+      nearest = next(neighbor_streams[low], None)
+      if nearest is None:
+        heapq.heappop(heap)
+      else:
+        heapq.heapreplace(heap, (nearest[0], nearest[1], low))
+
+
 def get_island_sizes(
     num_coords: int,
     connected_pairs: Sequence[tuple[int, int, int]]
@@ -58,35 +243,53 @@ def get_island_sizes(
   return island_sizes
 
 
-if __name__ == "__main__":
+def main(file_name: str = _DATA_FILE_NAME) -> common.AdventOfCodeManager:
   aoc_manager = common.AdventOfCodeManager()
-  data = common.read_and_parse_multicolumn_file(
-    _DATA_FILE_NAME,
-    [int, int, int],
+  coord_columns = common.read_multicolumn_file_as_arrays(
+    file_name,
+    'qqq',
     separator=','
   )
-  data = [tuple(coord) for coord in data]
+  data = list(zip(*coord_columns))
   part_1_sol = part_2_sol = 0
 
-  distance_pairs = build_distance_pairs(data)
-  distance_pairs = sorted(distance_pairs, key=lambda x: x[2])
-  connected_pairs = distance_pairs[:_NUM_PAIRS_TO_CONNECT]
-  island_sizes = get_island_sizes(len(data), connected_pairs)
-  island_sizes = sorted(island_sizes, reverse=True)
+  islands = common.DisjointSet(len(data))
+  for connection in get_closest_pairs(coord_columns, _NUM_PAIRS_TO_CONNECT):
+    islands.union(connection[0], connection[1])
 
-  part_1_sol = island_sizes[0]*island_sizes[1]*island_sizes[2]
+  part_1_sol = math.prod(islands.largest_component_sizes(3))
   aoc_manager.submit_part_1(part_1_sol, expectation=50568)
 
-  num_connections = _NUM_PAIRS_TO_CONNECT
-  while len(island_sizes) > 1:
-    num_connections = num_connections + len(island_sizes) - 1
-    connected_pairs = distance_pairs[:num_connections]
-    island_sizes = get_island_sizes(len(data), connected_pairs)
-  final_connection = connected_pairs[-1]
+  final_connection = get_minimum_spanning_tree(coord_columns)[-1]
   part_2_sol = (
     data[final_connection[0]][0] *
     data[final_connection[1]][0]
   )
+  # No recorded answer: the puzzle input is not in the tree to confirm one
   aoc_manager.submit_part_2(part_2_sol, expectation=None)
 
-  aoc_manager.show()
+  return aoc_manager
+
+
+if __name__ == "__main__":
+  # The pair engines agree with a stable sort of the brute-force pairs on a
+  # small clustered cloud, where tied distances are common
+  rng = random.Random(0)
+  test_coords = [tuple(rng.randrange(30) for _ in range(3)) for _ in range(80)]
+  test_columns = [list(axis) for axis in zip(*test_coords)]
+  brute_force_pairs = sorted(build_distance_pairs(test_coords), key=lambda pair: pair[2])
+  for cell_size in (None, 1, 50):
+    bucket_pairs = CoordBuckets(test_coords, cell_size).iter_pairs_by_distance()
+    assert list(bucket_pairs) == brute_force_pairs
+  assert get_closest_pairs(test_columns, 200, tile_size=16) == brute_force_pairs[:200]
+
+  # Kruskal over the same sorted pairs makes its final connection on the last
+  # edge of the Prim's tree
+  kruskal_islands = common.DisjointSet(len(test_coords))
+  kruskal_final = next(
+    pair for pair in brute_force_pairs
+    if kruskal_islands.union(pair[0], pair[1]) and kruskal_islands.component_count == 1
+  )
+  assert kruskal_final == get_minimum_spanning_tree(test_columns)[-1]
+
+  main().show()
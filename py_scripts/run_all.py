@@ -0,0 +1,115 @@
+
+from typing import Final, Any, Sequence
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import glob
+import importlib
+import os
+import sys
+import time
+
+import common
+
+_SCRIPT_DIR: Final = os.path.dirname(os.path.abspath(__file__))
+_DATA_DIR: Final = os.path.join(_SCRIPT_DIR, 'data')
+_DAY_MODULE_PATTERN: Final = 'day_[0-9][0-9].py'
+
+
+def discover_day_modules(days: Sequence[int] | None = None) -> list[str]:
+  module_names = sorted(
+    os.path.splitext(os.path.basename(path))[0]
+    for path in glob.glob(os.path.join(_SCRIPT_DIR, _DAY_MODULE_PATTERN))
+  )
+  if days:
+    wanted = {f'day_{day:02d}' for day in days}
+    missing = wanted.difference(module_names)
+    if missing:
+      raise ValueError(f"No module found for {sorted(missing)}")
+    module_names = [name for name in module_names if name in wanted]
+  return module_names
+
+
+def run_day(
+    module_name: str,
+    data_dir: str = _DATA_DIR,
+) -> tuple[str, tuple[Any, Any] | None, tuple[Any, Any] | None, float, float]:
+  # Runs in a worker: returns (module, (part 1, expectation), (part 2,
+  # expectation), wall seconds, CPU seconds) for the day's main
+  cpu_start = time.process_time()
+  wall_start = time.perf_counter()
+  if _SCRIPT_DIR not in sys.path:
+    sys.path.insert(0, _SCRIPT_DIR)
+  module = importlib.import_module(module_name)
+  file_name = os.path.join(data_dir, os.path.basename(module._DATA_FILE_NAME))
+  aoc_manager: common.AdventOfCodeManager = module.main(file_name)
+  parts = tuple(
+    None if solution is None else solution[:2]
+    for solution in (aoc_manager.part_1_solution, aoc_manager.part_2_solution)
+  )
+  return (
+    module_name,
+    *parts,
+    time.perf_counter() - wall_start,
+    time.process_time() - cpu_start,
+  )
+
+
+def get_part_status(part: tuple[Any, Any] | None) -> str:
+  if part is None:
+    return 'missing'
+  solution, expectation = part
+  if expectation is None:
+    return 'unchecked'
+  return 'ok' if solution == expectation else 'WRONG'
+
+
+def run_all(
+    module_names: Sequence[str],
+    data_dir: str = _DATA_DIR,
+    max_workers: int | None = None,
+) -> bool:
+  # One worker per day, so the whole calendar takes about as long as its
+  # slowest day. Returns whether every checked part matched its expectation.
+  all_correct = True
+  total_cpu = 0.
+  wall_start = time.perf_counter()
+  with ProcessPoolExecutor(max_workers=max_workers or len(module_names) or None) as executor:
+    futures = [
+      (module_name, executor.submit(run_day, module_name, data_dir))
+      for module_name in module_names
+    ]
+    for module_name, future in futures:
+      try:
+        _, part_1, part_2, wall_time, cpu_time = future.result()
+      except Exception as error:
+        all_correct = False
+        print(f"{module_name}  FAILED  {type(error).__name__}: {error}")
+        continue
+      total_cpu += cpu_time
+      statuses = [get_part_status(part) for part in (part_1, part_2)]
+      all_correct &= 'WRONG' not in statuses and 'missing' not in statuses
+      answers = [
+        f"part {part_num}: {'-' if part is None else part[0]} ({status})"
+        for part_num, (part, status) in enumerate(zip((part_1, part_2), statuses), 1)
+      ]
+      print(f"{module_name}  {'  '.join(answers)}  {wall_time:.3f} s wall  {cpu_time:.3f} s CPU")
+  wall_time = time.perf_counter() - wall_start
+
+  speedup = total_cpu / wall_time if wall_time else 0.
+  print(f"\nTotal: {wall_time:.3f} s wall against {total_cpu:.3f} s summed CPU ({speedup:.1f}x)")
+  return all_correct
+
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description="Run every day's solution in parallel")
+  parser.add_argument('days', nargs='*', type=int, help="Days to run, all when omitted")
+  parser.add_argument('--data-dir', default=_DATA_DIR, help="Directory holding day_XX.txt inputs")
+  parser.add_argument('--jobs', type=int, default=None, help="Worker processes, one per day by default")
+  args = parser.parse_args()
+
+  all_correct = run_all(
+    discover_day_modules(args.days),
+    os.path.abspath(args.data_dir),
+    args.jobs,
+  )
+  sys.exit(0 if all_correct else 1)